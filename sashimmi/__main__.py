@@ -1,13 +1,45 @@
 #!/usr/bin/env python3
 
-import argparse
-import logging
 import os
+import sys
 
-from .subcommands import get_subcommand, get_subcommands
+from .constants import SASHIMMI_DISCOVERY
+
+# Shell completion scripts invoke "sashimmi complete -- WORD" on every
+# keystroke; answer those without importing the subcommand registry.
+_COMPLETION_FAST_PATH = ["complete", "--"]
+
+# Shims invoke "sashimmi --root=ROOT run REFERENCE ..."; try to answer those
+# from the reference table before paying for the full command line parser.
+_ROOT_OPTION = "--root="
+_RUN_SUBCOMMAND = "run"
 
 
 def main():
+    if sys.argv[1:3] == _COMPLETION_FAST_PATH and len(sys.argv) <= 4:
+        from .models.completion import print_completions
+        print_completions(os.getcwd(), "".join(sys.argv[3:]))
+        return
+
+    if (
+        len(sys.argv) >= 4 and sys.argv[1].startswith(_ROOT_OPTION)
+        and sys.argv[2] == _RUN_SUBCOMMAND and not sys.argv[3].startswith("-")
+    ):
+        from .models.launch import launch_from_reference_table
+        launch_from_reference_table(
+            sys.argv[1][len(_ROOT_OPTION):], sys.argv[3], sys.argv[4:]
+        )
+
+    import argparse
+    import logging
+
+    from .models.discovery import (
+        DISCOVERY_AUTO,
+        DISCOVERY_GIT,
+        DISCOVERY_WALK,
+    )
+    from .subcommands import get_subcommand, get_subcommands
+
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--verbose",
@@ -22,6 +54,14 @@ def main():
         "Search for sashimmi root node from this alternate location instead of current working directory."
     )
 
+    parser.add_argument(
+        "--discovery",
+        choices=[DISCOVERY_AUTO, DISCOVERY_GIT, DISCOVERY_WALK],
+        default=SASHIMMI_DISCOVERY,
+        help=
+        "Find package nodes from the git index, by walking the workspace, or automatically."
+    )
+
     subparsers = parser.add_subparsers(dest="subcommand")
     subparsers.required = True
 
@@ -1,4 +1,7 @@
+from .cached import CachedAction
 from .command import CommandAction
 from .docker import DockerAction
+from .pipeline import PipelineAction
+from .python import PythonAction
 
 from .action import get_action_class
@@ -37,3 +37,6 @@ class Action(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def substitutions(self, existing_substitutions):
         pass
+
+    def nested_actions(self):
+        return []
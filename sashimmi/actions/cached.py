@@ -0,0 +1,99 @@
+import logging
+import os
+import subprocess
+
+from .action import Action, register_action_class
+from ..models.output_cache import OutputCache
+
+
+def _require_list(yaml_node, attribute, target_reference):
+    if attribute not in yaml_node:
+        raise KeyError(
+            "Cached component in target {target} is missing required attribute '{attribute}'"
+            .format(target=target_reference, attribute=attribute)
+        )
+    value = yaml_node[attribute]
+    if not isinstance(value, list) or not value:
+        raise ValueError(
+            "Cached component in target {target} requires a non-empty list for attribute '{attribute}'"
+            .format(target=target_reference, attribute=attribute)
+        )
+    return value
+
+
+def _require_outputs(yaml_node, target_reference):
+    outputs = _require_list(yaml_node, "outputs", target_reference)
+    for output in outputs:
+        normalized = os.path.normpath(output)
+        # Outputs are copied between the package and the cache entry, so
+        # they must stay inside the package.
+        if (
+            os.path.isabs(normalized) or normalized in (".", "..")
+            or normalized.startswith("../")
+        ):
+            raise ValueError(
+                "Cached component in target {target} declares output '{output}' outside of its package"
+                .format(target=target_reference, output=output)
+            )
+    return outputs
+
+
+class CachedAction(Action):
+    @staticmethod
+    def name():
+        return "cached"
+
+    @staticmethod
+    def make_from_yaml_node(yaml_node, target_reference):
+        return CachedAction(
+            _require_list(yaml_node, "inputs", target_reference),
+            _require_outputs(yaml_node, target_reference),
+        )
+
+    def __init__(self, inputs, outputs):
+        self.inputs = inputs
+        self.outputs = outputs
+
+    def adapter(self):
+        return None
+
+    def command_line_arguments(self):
+        return []
+
+    def environment_variables(self):
+        return {}
+
+    def substitutions(self, existing_substitutions):
+        return existing_substitutions
+
+    def execute(self, target, arguments, variables, environment):
+        cache = OutputCache(target.workspace.root)
+        base = target.package.absolute_path
+        key = cache.key(base, self.inputs, self.outputs, arguments, variables)
+
+        if cache.restore(key, base, self.outputs):
+            hits, misses = cache.record(True)
+            logging.info(
+                "Output cache hit for target '%s' (%s); hits=%d misses=%d",
+                target.reference,
+                key[:12],
+                hits,
+                misses,
+            )
+            return 0
+
+        hits, misses = cache.record(False)
+        logging.info(
+            "Output cache miss for target '%s' (%s); hits=%d misses=%d",
+            target.reference,
+            key[:12],
+            hits,
+            misses,
+        )
+        returncode = subprocess.call(arguments, env=environment)
+        if returncode == 0:
+            cache.store(key, base, self.outputs)
+        return returncode
+
+
+register_action_class(CachedAction)
@@ -1,4 +1,5 @@
 from .action import Action, register_action_class
+from ..constants import SASHIMMI_DOCKER
 from ..adapters.shell import ShellAdapter
 
 
@@ -12,7 +13,7 @@ class DockerAction(Action):
         if "image" not in yaml_node:
             raise KeyError(
                 "Docker component in target {target} is missing required attriute 'image'"
-                .format(target_reference)
+                .format(target=target_reference)
             )
         return DockerAction(
             yaml_node["image"],
@@ -24,18 +25,25 @@ class DockerAction(Action):
         self.image = image
         self.arguments = arguments if arguments else []
         self.variables = variables if variables else {}
+        self.digest = None
+        self.scheduling = None
 
     def adapter(self):
         return ShellAdapter()
 
-    def command_line_arguments(self):
-        command = ["docker", "run"]
+    def command_line_arguments(self, inner_variables=None):
+        variables = dict(self.variables)
+        if inner_variables:
+            variables.update(inner_variables)
+        command = [SASHIMMI_DOCKER, "run"]
         command += [
             "--env={key}={value}".format(key=key, value=value)
-            for key, value in self.variables.items()
+            for key, value in variables.items()
         ]
+        if self.scheduling:
+            command += self.scheduling.docker_arguments()
         command += self.arguments
-        command.append(self.image)
+        command.append(self.digest if self.digest else self.image)
         return command
 
     def environment_variables(self):
@@ -0,0 +1,156 @@
+import os
+import signal
+
+from .action import Action, get_action_class, register_action_class
+
+# Stages that the pipeline cannot spawn as a plain process.
+_UNSUPPORTED_STAGE_ACTIONS = ["cached", "pipeline"]
+
+# Exit status of a stage killed by a signal, as reported by shells.
+_SIGNAL_STATUS_BASE = 128
+
+
+def _make_stage(yaml_node, target_reference, index):
+    if not isinstance(yaml_node, list) or not yaml_node:
+        raise ValueError(
+            "Pipeline stage {index} in target {target} requires a non-empty list of actions"
+            .format(index=index, target=target_reference)
+        )
+    actions = []
+    for action_yaml_node in yaml_node:
+        if "action" not in action_yaml_node:
+            raise KeyError(
+                "Action in pipeline stage {index} of target {target} is missing required attribute 'action'"
+                .format(index=index, target=target_reference)
+            )
+        name = action_yaml_node["action"]
+        if name in _UNSUPPORTED_STAGE_ACTIONS:
+            raise ValueError(
+                "Pipeline stage {index} in target {target} cannot use action '{name}'"
+                .format(index=index, target=target_reference, name=name)
+            )
+        actions.append(
+            get_action_class(name).make_from_yaml_node(
+                action_yaml_node, target_reference
+            )
+        )
+    return actions
+
+
+def _exit_status(wait_status):
+    status = os.waitstatus_to_exitcode(wait_status)
+    return _SIGNAL_STATUS_BASE - status if status < 0 else status
+
+
+def _pipeline_status(statuses):
+    # Like "set -o pipefail": the rightmost failing stage decides. Upstream
+    # stages killed by SIGPIPE only saw a consumer that stopped reading.
+    for index, status in reversed(list(enumerate(statuses))):
+        last = index == len(statuses) - 1
+        if status != 0 and (
+            last or status != _SIGNAL_STATUS_BASE + signal.SIGPIPE
+        ):
+            return status
+    return 0
+
+
+class PipelineAction(Action):
+    @staticmethod
+    def name():
+        return "pipeline"
+
+    @staticmethod
+    def make_from_yaml_node(yaml_node, target_reference):
+        stages = yaml_node.get("stages")
+        if not isinstance(stages, list) or len(stages) < 2:
+            raise ValueError(
+                "Pipeline component in target {target} requires a list of at least two 'stages'"
+                .format(target=target_reference)
+            )
+        return PipelineAction([
+            _make_stage(stage, target_reference, index)
+            for index, stage in enumerate(stages)
+        ])
+
+    def __init__(self, stages):
+        self.stages = stages
+
+    def adapter(self):
+        return None
+
+    def command_line_arguments(self):
+        return []
+
+    def environment_variables(self):
+        return {}
+
+    def substitutions(self, existing_substitutions):
+        return existing_substitutions
+
+    def nested_actions(self):
+        return [action for stage in self.stages for action in stage]
+
+    def adapt_stages(self, target, apply_substitutions=False):
+        stages = []
+        for actions in self.stages:
+            arguments, variables = target.adapt_actions(
+                actions, apply_substitutions=apply_substitutions
+            )
+            if not arguments:
+                raise ValueError(
+                    "Pipeline stage in target {reference} produces no command line"
+                    .format(reference=target.reference)
+                )
+            stages.append((arguments, variables))
+        return stages
+
+    def execute(self, target, environment):
+        stages = self.adapt_stages(target, apply_substitutions=True)
+
+        # Each stage reads the previous stage's pipe on stdin and writes the
+        # next one on stdout. Pipe ends are close-on-exec, so a stage only
+        # keeps the two ends duplicated onto its standard streams.
+        pids = []
+        stdin = None
+        try:
+            for index, (arguments, variables) in enumerate(stages):
+                if index < len(stages) - 1:
+                    next_stdin, stdout = os.pipe()
+                else:
+                    next_stdin, stdout = None, None
+                file_actions = []
+                if stdin is not None:
+                    file_actions.append((os.POSIX_SPAWN_DUP2, stdin, 0))
+                if stdout is not None:
+                    file_actions.append((os.POSIX_SPAWN_DUP2, stdout, 1))
+                stage_environment = environment.copy()
+                stage_environment.update(variables)
+                try:
+                    pids.append(
+                        os.posix_spawnp(
+                            arguments[0],
+                            arguments,
+                            stage_environment,
+                            file_actions=file_actions,
+                            setsigdef=[signal.SIGPIPE],
+                        )
+                    )
+                finally:
+                    for descriptor in [stdin, stdout]:
+                        if descriptor is not None:
+                            os.close(descriptor)
+                    stdin = next_stdin
+        except BaseException:
+            # Stages already running may be waiting on input that will never
+            # come; stop them before reporting the failure.
+            for pid in pids:
+                os.kill(pid, signal.SIGTERM)
+            raise
+        finally:
+            if stdin is not None:
+                os.close(stdin)
+            statuses = [_exit_status(os.waitpid(pid, 0)[1]) for pid in pids]
+        return _pipeline_status(statuses)
+
+
+register_action_class(PipelineAction)
@@ -0,0 +1,131 @@
+import importlib
+import logging
+import os
+import runpy
+import sys
+
+from .action import Action, register_action_class
+from .command import _substitute_workspace, _substitute_package
+from ..adapters._internal import substitute_list, substitute_string
+
+_PYTHON_INTERPRETER = "python3"
+
+
+def _bootstrap_code(module, callable_name, path):
+    code = "import sys; "
+    if path:
+        code += "sys.path.insert(0, {path!r}); ".format(path=path)
+    if callable_name:
+        code += "import importlib; sys.argv[0] = {module!r}; sys.exit(importlib.import_module({module!r}).{callable_name}())".format(
+            module=module, callable_name=callable_name
+        )
+    else:
+        code += "import runpy; sys.argv[0] = {module!r}; runpy.run_module({module!r}, run_name='__main__', alter_sys=True)".format(
+            module=module
+        )
+    return code
+
+
+class PythonAction(Action):
+    @staticmethod
+    def name():
+        return "python"
+
+    @staticmethod
+    def make_from_yaml_node(yaml_node, target_reference):
+        if "module" not in yaml_node:
+            raise KeyError(
+                "Python component in target {target} is missing required attribute 'module'"
+                .format(target=target_reference)
+            )
+        module, _, callable_name = yaml_node["module"].partition(":")
+        return PythonAction(
+            module,
+            callable_name=callable_name if callable_name else None,
+            path=yaml_node.get("path"),
+            arguments=yaml_node.get("arguments"),
+            variables=yaml_node.get("variables")
+        )
+
+    def __init__(
+        self,
+        module,
+        callable_name=None,
+        path=None,
+        arguments=None,
+        variables=None
+    ):
+        self.module = module
+        self.callable_name = callable_name
+        self.path = path
+        self.arguments = arguments if arguments else []
+        self.variables = variables if variables else {}
+
+    def adapter(self):
+        return None
+
+    def command_line_arguments(self):
+        return [
+            _PYTHON_INTERPRETER,
+            "-c",
+            _bootstrap_code(self.module, self.callable_name, self.path),
+        ] + self.arguments
+
+    def environment_variables(self):
+        return self.variables
+
+    def substitutions(self, existing_substitutions):
+        new_substitutions = existing_substitutions.copy()
+        new_substitutions.update({
+            "workspace": _substitute_workspace,
+            "wks": _substitute_workspace,
+            "w": _substitute_workspace,
+            "package": _substitute_package,
+            "pkg": _substitute_package,
+            "p": _substitute_package,
+        })
+        return new_substitutions
+
+    @staticmethod
+    def find_in_process(target):
+        if len(target.actions) != 1:
+            return None
+        action = target.actions[0]
+        return action if isinstance(action, PythonAction) else None
+
+    def execute(self, target, variables, arguments=()):
+        # Runs the tool as "python3 -c" would, as far as this process allows.
+        # Still shared with sashimmi: atexit hooks and signal handlers it
+        # registered, and the modules it already imported, which the tool
+        # gets as they are instead of importing its own versions.
+        root_logger = logging.getLogger()
+        for handler in list(root_logger.handlers):
+            root_logger.removeHandler(handler)
+        root_logger.setLevel(logging.WARNING)
+
+        if sys.flags.no_site:
+            # Launcher shims start without site; the target's own imports
+            # may still need site-packages.
+            import site
+            site.main()
+
+        substitutions = self.substitutions({})
+        # "-c" puts the working directory first on the path.
+        sys.path.insert(0, "")
+        if self.path:
+            sys.path.insert(
+                0, substitute_string(self.path, target, substitutions)
+            )
+        sys.argv = [self.module] + substitute_list(
+            self.arguments + list(arguments), target, substitutions
+        )
+        os.environ.update(variables)
+
+        if self.callable_name:
+            module = importlib.import_module(self.module)
+            return getattr(module, self.callable_name)()
+        runpy.run_module(self.module, run_name="__main__", alter_sys=True)
+        return 0
+
+
+register_action_class(PythonAction)
@@ -25,6 +25,15 @@ def substitute_string(value, target, substitutions, apply_substitutions=True):
     return value
 
 
+def escape_string(value):
+    # Inverse of the %% rule above, for values that are substituted again.
+    return re.sub(
+        "{sub}+".format(sub=TARGET_SUBSTITUTION_TOKEN),
+        lambda match: match.group(0) + TARGET_SUBSTITUTION_TOKEN,
+        value,
+    )
+
+
 def substitute_list(items, target, substitutions, apply_substitutions=True):
     if not apply_substitutions:
         return items
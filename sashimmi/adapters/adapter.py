@@ -1,12 +1,41 @@
 import abc
+import enum
 
 
 class Adapter(metaclass=abc.ABCMeta):
+    class Mode(enum.Enum):
+        AUTO = "auto"
+        DIRECT = "direct"
+        SHELL = "shell"
+
     def __init__(self):
         self.actions = []
+        self.inner_adapters = []
+        self.mode = Adapter.Mode.AUTO
 
-    def adapt(self, action):
+    def adapt(self, action, inner_adapter=None):
         self.actions.append(action)
+        self.inner_adapters.append(inner_adapter)
+
+    def action_command_line_arguments(
+        self, target=None, apply_substitutions=False
+    ):
+        # Adapters are made per call, so the inner adapter an action opened
+        # is kept here rather than on the shared, parsed action.
+        for action, inner_adapter in zip(self.actions, self.inner_adapters):
+            if inner_adapter is None:
+                yield action, action.command_line_arguments()
+            else:
+                yield action, action.command_line_arguments(
+                    inner_adapter.forwarded_variables(
+                        target, apply_substitutions=apply_substitutions
+                    )
+                )
+
+    def forwarded_variables(self, target, apply_substitutions=False):
+        # Variables the action that opened this adapter must hand on itself,
+        # e.g. into a container, rather than through this process.
+        return {}
 
     @abc.abstractmethod
     def command_line_arguments(self, target, apply_substitutions=False):
@@ -9,10 +9,12 @@ class ExecAdapter(Adapter):
     def command_line_arguments(self, target, apply_substitutions=False):
         arguments = []
         substitutions = {}
-        for action in self.actions:
+        for action, action_arguments in self.action_command_line_arguments(
+            target, apply_substitutions=apply_substitutions
+        ):
             substitutions = action.substitutions(substitutions)
             arguments += substitute_list(
-                action.command_line_arguments(),
+                action_arguments,
                 target,
                 substitutions,
                 apply_substitutions=apply_substitutions,
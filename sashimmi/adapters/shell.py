@@ -1,37 +1,83 @@
-from ._internal import substitute_list, substitute_dict
+import re
+import shlex
+
+from ._internal import escape_string, substitute_list, substitute_dict
 from .adapter import Adapter
 
+_SHELL_FEATURE_PATTERN = re.compile(r"[|&;<>()$`\\*?\[\]{}~!#\n]")
+
 
 class ShellAdapter(Adapter):
     def __init__(self):
         super(ShellAdapter, self).__init__()
 
-    def command_line_arguments(self, target, apply_substitutions=False):
-        cmd_line_args = []
+    def __variables(self, target, apply_substitutions):
+        variables = {}
         substitutions = {}
         for action in self.actions:
             substitutions = action.substitutions(substitutions)
-            cmd_line_args += substitute_list(
-                action.command_line_arguments(),
-                target,
-                substitutions,
-                apply_substitutions=apply_substitutions,
+            variables.update(
+                substitute_dict(
+                    action.environment_variables(),
+                    target,
+                    substitutions,
+                    apply_substitutions=apply_substitutions,
+                )
             )
+        return variables
+
+    def uses_shell(self):
+        if self.mode == Adapter.Mode.SHELL:
+            return True
+        if self.mode == Adapter.Mode.DIRECT:
+            return False
+        for _action, action_arguments in self.action_command_line_arguments():
+            for argument in action_arguments:
+                if _SHELL_FEATURE_PATTERN.search(argument):
+                    return True
+        return False
 
-        env_var_args = []
+    def forwarded_variables(self, target, apply_substitutions=False):
+        if self.uses_shell():
+            return {}
+        variables = self.__variables(target, apply_substitutions)
+        if not apply_substitutions:
+            return variables
+        # The outer adapter substitutes the forwarded values once more.
+        return {key: escape_string(value) for key, value in variables.items()}
+
+    def __quote(self, argument):
+        # Arguments only end up in a shell because others needed one; keep
+        # them single words unless they were written as shell syntax.
+        if self.mode != Adapter.Mode.AUTO:
+            return argument
+        if _SHELL_FEATURE_PATTERN.search(argument):
+            return argument
+        return shlex.quote(argument)
+
+    def command_line_arguments(self, target, apply_substitutions=False):
+        cmd_line_args = []
         substitutions = {}
-        for action in self.actions:
+        for action, action_arguments in self.action_command_line_arguments(
+            target, apply_substitutions=apply_substitutions
+        ):
             substitutions = action.substitutions(substitutions)
-            variables = substitute_dict(
-                action.environment_variables(),
+            cmd_line_args += substitute_list(
+                action_arguments,
                 target,
                 substitutions,
                 apply_substitutions=apply_substitutions,
             )
-            env_var_args += [
-                "{key}={value}".format(key=key, value=value)
-                for key, value in variables.items()
-            ]
+
+        if not self.uses_shell():
+            return cmd_line_args
+
+        env_var_args = [
+            "{key}={value}".format(key=key, value=self.__quote(value))
+            for key, value in
+            self.__variables(target, apply_substitutions).items()
+        ]
+        cmd_line_args = [self.__quote(argument) for argument in cmd_line_args]
 
         if env_var_args:
             return ["sh", "-c", " ".join(env_var_args + cmd_line_args)]
@@ -39,4 +85,6 @@ class ShellAdapter(Adapter):
             return cmd_line_args
 
     def environment_variables(self, target, apply_substitutions=False):
+        # Variables reach the command through the shell or the opening
+        # action, never through the outer process.
         return {}
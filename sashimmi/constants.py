@@ -2,9 +2,49 @@ import os
 
 SASHIMMI_ROOT_NODE = ".sashimmi"
 SASHIMMI_BIN_NODE = "bin"
+SASHIMMI_DISPATCHER_NODE = ".dispatch"
+SASHIMMI_BIND_MODE_NODE = "bind-mode"
+SASHIMMI_LAUNCHER_NODE = "launcher.pyz"
 SASHIMMI_SHIMS_NODE = "shims.yaml"
+SASHIMMI_SHIMS_DATABASE_NODE = "shims.db"
+SASHIMMI_SHIMS_INDEX_NODE = "shims.index"
 SASHIMMI_PACKAGE_NODE = ".sashimmi.yaml"
 SASHIMMI_LOCK_NODE = "lock"
+SASHIMMI_PENDING_NODE = "pending"
+SASHIMMI_COMPLETION_NODE = "completion.json"
+SASHIMMI_REFERENCE_TABLE_NODE = "references.table"
+SASHIMMI_IMAGE_DIGESTS_NODE = "images.yaml"
+SASHIMMI_USAGE_LOG_NODE = "usage.log"
+SASHIMMI_USAGE_SUMMARY_NODE = "usage.json"
+SASHIMMI_SNAPSHOTS_NODE = "snapshots"
+SASHIMMI_CACHE_NODE = "cache"
+SASHIMMI_CACHE_OUTPUTS_NODE = "outputs"
+SASHIMMI_CACHE_STATS_NODE = "stats.json"
+
+SASHIMMI_CACHE_MAX_SIZE = int(
+    os.environ.get("SASHIMMI_CACHE_MAX_SIZE", 1024 * 1024 * 1024)
+)
+
+SASHIMMI_DISCOVERY = os.environ.get("SASHIMMI_DISCOVERY", "auto")
+SASHIMMI_DOCKER = os.environ.get("SASHIMMI_DOCKER", "docker")
+SASHIMMI_SNAPSHOT_VARIABLE = "SASHIMMI_WORKSPACE_SNAPSHOT"
+SASHIMMI_BUNDLE = os.environ.get("SASHIMMI_BUNDLE")
+SASHIMMI_RECORD_USAGE = os.environ.get("SASHIMMI_RECORD_USAGE", "") not in (
+    "",
+    "0",
+)
+
+_DEFAULT_SASHIMMI_USER_CACHE_NODE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")),
+    "sashimmi",
+)
+SASHIMMI_USER_CACHE_NODE = os.environ.get(
+    "SASHIMMI_CACHE_HOME", _DEFAULT_SASHIMMI_USER_CACHE_NODE
+)
+SASHIMMI_PARSE_CACHE_NODE = "packages"
+SASHIMMI_PARSE_CACHE_MAX_SIZE = int(
+    os.environ.get("SASHIMMI_PARSE_CACHE_MAX_SIZE", 256 * 1024 * 1024)
+)
 
 _DEFAULT_SASHIMMI_MULTI_ROOT_NODE = os.path.join(
     os.environ.get("XDG_DATA_HOME", os.path.expanduser("~/.local/share")),
@@ -16,6 +56,10 @@ SASHIMMI_MULTI_ROOT_NODE = os.environ.get(
 SASHIMMI_MULTI_BIN_NODE = "bin"
 SASHIMMI_MULTI_SHIMS_NODE = "shims"
 SASHIMMI_MULTI_LOCK_NODE = "lock"
+SASHIMMI_MULTI_LOCKS_NODE = "locks"
+SASHIMMI_MULTI_LOCK_SHARDS = int(
+    os.environ.get("SASHIMMI_MULTI_LOCK_SHARDS", 64)
+)
 
 ROOT_ANCHOR_TOKEN = "//"
 REFERENCE_PATH_SEPARATOR_TOKEN = "/"
@@ -33,14 +77,84 @@ def bin_node(root):
     return os.path.join(root, SASHIMMI_ROOT_NODE, SASHIMMI_BIN_NODE)
 
 
+def dispatcher_node(root):
+    return os.path.join(bin_node(root), SASHIMMI_DISPATCHER_NODE)
+
+
+def bind_mode_node(root):
+    return os.path.join(root, SASHIMMI_ROOT_NODE, SASHIMMI_BIND_MODE_NODE)
+
+
+def launcher_node(root):
+    return os.path.join(root, SASHIMMI_ROOT_NODE, SASHIMMI_LAUNCHER_NODE)
+
+
 def shims_node(root):
     return os.path.join(root, SASHIMMI_ROOT_NODE, SASHIMMI_SHIMS_NODE)
 
 
+def shims_database_node(root):
+    return os.path.join(root, SASHIMMI_ROOT_NODE, SASHIMMI_SHIMS_DATABASE_NODE)
+
+
+def shims_index_node(root):
+    return os.path.join(root, SASHIMMI_ROOT_NODE, SASHIMMI_SHIMS_INDEX_NODE)
+
+
 def lock_node(root):
     return os.path.join(root, SASHIMMI_ROOT_NODE, SASHIMMI_LOCK_NODE)
 
 
+def pending_node(root):
+    return os.path.join(root, SASHIMMI_ROOT_NODE, SASHIMMI_PENDING_NODE)
+
+
+def completion_node(root):
+    return os.path.join(root, SASHIMMI_ROOT_NODE, SASHIMMI_COMPLETION_NODE)
+
+
+def reference_table_node(root):
+    return os.path.join(
+        root, SASHIMMI_ROOT_NODE, SASHIMMI_REFERENCE_TABLE_NODE
+    )
+
+
+def image_digests_node(root):
+    return os.path.join(root, SASHIMMI_ROOT_NODE, SASHIMMI_IMAGE_DIGESTS_NODE)
+
+
+def usage_log_node(root):
+    return os.path.join(root, SASHIMMI_ROOT_NODE, SASHIMMI_USAGE_LOG_NODE)
+
+
+def usage_summary_node(root):
+    return os.path.join(root, SASHIMMI_ROOT_NODE, SASHIMMI_USAGE_SUMMARY_NODE)
+
+
+def snapshots_node(root):
+    return os.path.join(root, SASHIMMI_ROOT_NODE, SASHIMMI_SNAPSHOTS_NODE)
+
+
+def cache_node(root):
+    return os.path.join(root, SASHIMMI_ROOT_NODE, SASHIMMI_CACHE_NODE)
+
+
+def cache_outputs_node(root):
+    return os.path.join(cache_node(root), SASHIMMI_CACHE_OUTPUTS_NODE)
+
+
+def cache_stats_node(root):
+    return os.path.join(cache_node(root), SASHIMMI_CACHE_STATS_NODE)
+
+
+def user_cache_node():
+    return SASHIMMI_USER_CACHE_NODE
+
+
+def parse_cache_node():
+    return os.path.join(SASHIMMI_USER_CACHE_NODE, SASHIMMI_PARSE_CACHE_NODE)
+
+
 def multi_root_node():
     return SASHIMMI_MULTI_ROOT_NODE
 
@@ -57,5 +171,9 @@ def multi_shim_node(name):
     return os.path.join(multi_shims_node(), name)
 
 
-def multi_lock_node():
-    return os.path.join(SASHIMMI_MULTI_ROOT_NODE, SASHIMMI_LOCK_NODE)
+def multi_locks_node():
+    return os.path.join(SASHIMMI_MULTI_ROOT_NODE, SASHIMMI_MULTI_LOCKS_NODE)
+
+
+def multi_lock_shard_node(shard):
+    return os.path.join(multi_locks_node(), "{shard:04x}".format(shard=shard))
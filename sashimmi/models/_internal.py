@@ -1,6 +1,10 @@
 import yaml
 
 
-def load_yaml_document(file_path):
-    document = yaml.safe_load(open(file_path, "r"))
+def load_yaml_content(content):
+    document = yaml.safe_load(content)
     return document if document else {}
+
+
+def load_yaml_document(file_path):
+    return load_yaml_content(open(file_path, "r"))
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import logging
+import os
+
+from ..constants import SASHIMMI_DISCOVERY, REFERENCE_PATH_SEPARATOR_TOKEN
+from ._internal import load_yaml_content
+from .discovery import find_package_directories
+from .image_digests import apply_image_digests
+from .package import Package
+from .reference import Reference
+from .workspace import Workspace
+
+# Bump whenever the bundle document changes shape.
+_BUNDLE_VERSION = 3
+
+
+def _read_node(path):
+    with open(path, "rb") as handle:
+        content = handle.read()
+    return content, hashlib.sha256(content).hexdigest()
+
+
+def write_workspace_bundle(workspace, path):
+    # Bundles hold the parsed package documents rather than model objects,
+    # so loading one only ever builds packages through Package.
+    packages = {}
+    for package in workspace.packages.values():
+        content, digest = _read_node(package.absolute_node)
+        packages[package.path] = {
+            "hash": digest,
+            "document": load_yaml_content(content),
+        }
+    temporary_path = "{path}.{pid}".format(path=path, pid=os.getpid())
+    with open(temporary_path, "w") as handle:
+        json.dump({"version": _BUNDLE_VERSION, "packages": packages}, handle)
+    os.replace(temporary_path, path)
+    return len(packages)
+
+
+class BundledWorkspace(Workspace):
+    # Packages come from a bundle built elsewhere and are only checked
+    # against the checkout when a reference reaches them: a package whose
+    # node hash matches is built from its bundled document, any other
+    # package is parsed from disk. Recursive wildcards run discovery below
+    # their package, so packages added since the export are found and
+    # deleted ones are skipped.
+
+    def __init__(self, root, documents, discovery=SASHIMMI_DISCOVERY):
+        super().__init__(root, {}, discovery=discovery)
+        self.documents = documents
+
+    def __package(self, package_reference):
+        if package_reference in self.packages:
+            return self.packages[package_reference]
+        try:
+            _content, digest = _read_node(
+                os.path.join(self.root, package_reference.package_node_path)
+            )
+        except FileNotFoundError:
+            return None
+        bundled = self.documents.get(package_reference.package_path)
+        if bundled and bundled["hash"] == digest:
+            package = Package.make_from_document(
+                package_reference, bundled["document"]
+            )
+        else:
+            logging.debug(
+                "Package %s is not bundled or stale; parsing it again",
+                package_reference
+            )
+            package = Package.make(self.root, package_reference)
+        package.workspace = self
+        apply_image_digests(self.root, {package_reference: package})
+        self.packages[package_reference] = package
+        return package
+
+    def __find_package_references(self, reference):
+        directory = os.path.join(self.root, reference.package_path)
+        if not os.path.isdir(directory):
+            return []
+        return [
+            Reference(
+                REFERENCE_PATH_SEPARATOR_TOKEN.join(
+                    path for path in (reference.package_path, relative)
+                    if path
+                ),
+                None,
+                mount_path=self.mount_path,
+            ) for relative in sorted(
+                find_package_directories(directory, discovery=self.discovery)
+            )
+        ]
+
+    def find_packages(self, reference):
+        if reference.mount_path != self.mount_path:
+            yield from super().find_packages(reference)
+            return
+        if reference.wildcard == Reference.Wildcard.RECURSIVE_WILDCARD:
+            for package_reference in self.__find_package_references(
+                reference
+            ):
+                package = self.__package(package_reference)
+                if package:
+                    yield package
+            return
+        package = self.__package(reference.package_part)
+        if package is None:
+            raise KeyError(
+                "Package {package} not found in workspace".format(
+                    package=reference.package_part
+                )
+            )
+        yield package
+
+
+def load_workspace_bundle(root, path, discovery=SASHIMMI_DISCOVERY):
+    try:
+        with open(path, "r") as handle:
+            bundle = json.load(handle)
+    except (OSError, ValueError) as error:
+        logging.warning("Ignoring workspace bundle %s: %s", path, error)
+        return None
+    if not isinstance(bundle, dict) or bundle.get(
+        "version"
+    ) != _BUNDLE_VERSION:
+        logging.warning(
+            "Ignoring workspace bundle %s with unsupported version", path
+        )
+        return None
+    return BundledWorkspace(root, bundle["packages"], discovery=discovery)
@@ -0,0 +1,195 @@
+import json
+import os
+
+from ..constants import (
+    SASHIMMI_PACKAGE_NODE,
+    ROOT_ANCHOR_TOKEN,
+    REFERENCE_PATH_SEPARATOR_TOKEN,
+    REFERENCE_PART_SEPARATOR_TOKEN,
+    PACKAGE_WILDCARD_TOKEN,
+    RECURSIVE_WILDCARD_TOKEN,
+    root_node,
+    completion_node,
+)
+from .discovery import discovery_inputs_are_current, find_package_directories
+
+# This module is imported on every completion keystroke, so it must not pull
+# in yaml or the subcommand registry at import time.
+
+_COMPLETION_INDEX_VERSION = 2
+
+
+def find_completion_root(directory):
+    directory = os.path.abspath(directory)
+    while not os.path.isdir(root_node(directory)):
+        if directory == "/":
+            return None
+        directory = os.path.dirname(directory)
+    return directory
+
+
+def _mtime(path):
+    return os.stat(path).st_mtime_ns
+
+
+def _read_target_names(node):
+    from ._internal import load_yaml_document
+
+    try:
+        document = load_yaml_document(node)
+    except Exception:
+        return []
+    return sorted(
+        target["name"] for target in document.get("targets", [])
+        if isinstance(target, dict) and "name" in target
+    )
+
+
+def _build_index(root):
+    packages = {}
+    inputs = {}
+    for relative in find_package_directories(root, inputs=inputs):
+        dirpath = os.path.join(root, relative)
+        node = os.path.join(dirpath, SASHIMMI_PACKAGE_NODE)
+        packages[relative] = {
+            "node_mtime": _mtime(node),
+            "directory_mtime": _mtime(dirpath),
+            "targets": _read_target_names(node),
+        }
+    return {
+        "version": _COMPLETION_INDEX_VERSION,
+        "discovery": inputs,
+        "packages": packages,
+    }
+
+
+def _index_is_valid(root, index):
+    if index.get("version") != _COMPLETION_INDEX_VERSION:
+        return False
+    # Package nodes only cover known packages; new ones show up in what
+    # discovery read.
+    if not discovery_inputs_are_current(index["discovery"]):
+        return False
+    try:
+        for path, entry in index["packages"].items():
+            directory = os.path.join(root, path)
+            node = os.path.join(directory, SASHIMMI_PACKAGE_NODE)
+            if _mtime(node) != entry["node_mtime"]:
+                return False
+            if _mtime(directory) != entry["directory_mtime"]:
+                return False
+    except OSError:
+        return False
+    return True
+
+
+def load_completion_index(root, refresh=False):
+    path = completion_node(root)
+    if not refresh:
+        try:
+            with open(path, "r") as handle:
+                index = json.load(handle)
+        except (OSError, ValueError):
+            index = None
+        if index and _index_is_valid(root, index):
+            return index
+
+    index = _build_index(root)
+    temporary_path = "{path}.{pid}".format(path=path, pid=os.getpid())
+    try:
+        with open(temporary_path, "w") as handle:
+            json.dump(index, handle)
+        os.replace(temporary_path, path)
+    except OSError:
+        pass
+    return index
+
+
+def _join(display, suffix):
+    if not display:
+        return suffix
+    return "{display}{separator}{suffix}".format(
+        display=display,
+        separator=REFERENCE_PATH_SEPARATOR_TOKEN,
+        suffix=suffix,
+    )
+
+
+def _complete_target(index, scope, prefix, word):
+    package_part, _, target_prefix = word.partition(
+        REFERENCE_PART_SEPARATOR_TOKEN
+    )
+    package_path = os.path.normpath(os.path.join(scope, package_part))
+    entry = index["packages"].get("" if package_path == "." else package_path)
+    if entry is None:
+        return []
+    names = entry["targets"] + [PACKAGE_WILDCARD_TOKEN]
+    return [
+        "{prefix}{package}{separator}{name}".format(
+            prefix=prefix,
+            package=package_part,
+            separator=REFERENCE_PART_SEPARATOR_TOKEN,
+            name=name,
+        ) for name in names if name.startswith(target_prefix)
+    ]
+
+
+def _complete_package(index, scope, prefix, word):
+    packages = set()
+    directories = set()
+    for path in index["packages"]:
+        if scope:
+            if path == scope:
+                path = ""
+            elif path.startswith(scope + REFERENCE_PATH_SEPARATOR_TOKEN):
+                path = path[len(scope) + 1:]
+            else:
+                continue
+        packages.add(path)
+        while path:
+            path = os.path.dirname(path)
+            directories.add(path)
+
+    depth = word.count(REFERENCE_PATH_SEPARATOR_TOKEN)
+    candidates = []
+    for display in sorted(packages | directories):
+        if not display.startswith(word):
+            continue
+        if display and display.count(REFERENCE_PATH_SEPARATOR_TOKEN) != depth:
+            continue
+        if display in packages:
+            candidates.append(display + REFERENCE_PART_SEPARATOR_TOKEN)
+        if display in directories:
+            if display:
+                candidates.append(display + REFERENCE_PATH_SEPARATOR_TOKEN)
+            candidates.append(_join(display, RECURSIVE_WILDCARD_TOKEN))
+    return [prefix + candidate for candidate in candidates]
+
+
+def complete_reference(root, cwd, word, refresh=False):
+    if word.startswith(ROOT_ANCHOR_TOKEN):
+        prefix = ROOT_ANCHOR_TOKEN
+        scope = ""
+        word = word[len(ROOT_ANCHOR_TOKEN):]
+    else:
+        prefix = ""
+        scope = os.path.relpath(os.path.abspath(cwd), start=root)
+        if scope == ".":
+            scope = ""
+        elif scope == ".." or scope.startswith("../"):
+            return []
+
+    index = load_completion_index(root, refresh=refresh)
+    if REFERENCE_PART_SEPARATOR_TOKEN in word:
+        return _complete_target(index, scope, prefix, word)
+    return _complete_package(index, scope, prefix, word)
+
+
+def print_completions(directory, word, refresh=False):
+    root = find_completion_root(directory)
+    if root is None:
+        return
+    for candidate in complete_reference(
+        root, os.getcwd(), word, refresh=refresh
+    ):
+        print(candidate)
@@ -0,0 +1,149 @@
+import os
+import subprocess
+
+from ..constants import (
+    SASHIMMI_ROOT_NODE,
+    SASHIMMI_PACKAGE_NODE,
+    SASHIMMI_DISCOVERY,
+)
+
+DISCOVERY_AUTO = "auto"
+DISCOVERY_GIT = "git"
+DISCOVERY_WALK = "walk"
+
+
+def _relative_directory(path):
+    return "" if path in ("", ".") else path
+
+
+# Directories below the root holding their own root node are mounts of
+# separate workspaces; their packages are only loaded through the mount.
+
+
+def _is_mount_point(root, directory, mount_points):
+    if directory not in mount_points:
+        mount_points[directory] = os.path.isdir(
+            os.path.join(root, directory, SASHIMMI_ROOT_NODE)
+        )
+    return mount_points[directory]
+
+
+def _is_mounted(root, directory, mount_points):
+    prefix = ""
+    for component in filter(None, directory.split("/")):
+        prefix = os.path.join(prefix, component)
+        if _is_mount_point(root, prefix, mount_points):
+            return True
+    return False
+
+
+# Discovery inputs map the paths discovery read to their (mtime, size), so
+# caches built from its result can tell when packages were added or removed:
+# every walked directory, or the git index.
+
+
+def _stat(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _git_index_node(root):
+    directory = os.path.abspath(root)
+    while True:
+        git_node = os.path.join(directory, ".git")
+        if os.path.isdir(git_node):
+            return os.path.join(git_node, "index")
+        if os.path.isfile(git_node):
+            # Worktrees and submodules point to their git directory.
+            with open(git_node, "r") as handle:
+                content = handle.read().strip()
+            if content.startswith("gitdir:"):
+                git_directory = content[len("gitdir:"):].strip()
+                return os.path.join(directory, git_directory, "index")
+            return None
+        if directory == "/":
+            return None
+        directory = os.path.dirname(directory)
+
+
+def _find_package_directories_with_walk(root, inputs):
+    for dirpath, dirnames, filenames in os.walk(root):
+        if dirpath == root and SASHIMMI_ROOT_NODE in dirnames:
+            # The root node holds sashimmi's own caches; recording it would
+            # make every cache write look like a change to the packages.
+            dirnames.remove(SASHIMMI_ROOT_NODE)
+        if inputs is not None:
+            inputs[dirpath] = _stat(dirpath)
+        if dirpath != root and SASHIMMI_ROOT_NODE in dirnames:
+            dirnames[:] = []
+            continue
+        if SASHIMMI_PACKAGE_NODE in filenames:
+            yield _relative_directory(os.path.relpath(dirpath, start=root))
+
+
+def _find_package_directories_with_git(root, inputs):
+    # Untracked packages are listed too, but only a change to the index is
+    # recorded as an input; they are picked up once the index changes.
+    try:
+        process = subprocess.run(
+            [
+                "git",
+                "ls-files",
+                "-z",
+                "--cached",
+                "--others",
+                "--exclude-standard",
+                "--",
+                "*" + SASHIMMI_PACKAGE_NODE,
+            ],
+            cwd=root,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+    except OSError:
+        return None
+    if process.returncode != 0:
+        return None
+
+    directories = set()
+    mount_points = {}
+    for path in process.stdout.decode("utf-8").split("\0"):
+        directory, _, node = path.rpartition("/")
+        if node != SASHIMMI_PACKAGE_NODE:
+            continue
+        # Tracked nodes deleted from the worktree are still in the index.
+        if not os.path.exists(os.path.join(root, path)):
+            continue
+        if not _is_mounted(root, directory, mount_points):
+            directories.add(_relative_directory(directory))
+    if inputs is not None:
+        index_node = _git_index_node(root)
+        if index_node and os.path.isfile(index_node):
+            inputs[index_node] = _stat(index_node)
+    return sorted(directories)
+
+
+def find_package_directories(root, discovery=SASHIMMI_DISCOVERY, inputs=None):
+    if discovery == DISCOVERY_WALK:
+        return list(_find_package_directories_with_walk(root, inputs))
+
+    directories = _find_package_directories_with_git(root, inputs)
+    if directories is not None:
+        return directories
+    if discovery == DISCOVERY_GIT:
+        raise RuntimeError(
+            "Failed to discover packages from the git index in {root}".format(
+                root=root
+            )
+        )
+    return list(_find_package_directories_with_walk(root, inputs))
+
+
+def discovery_inputs_are_current(inputs):
+    try:
+        for path, stat in inputs.items():
+            if _stat(path) != list(stat):
+                return False
+    except OSError:
+        return False
+    return True
@@ -0,0 +1,34 @@
+import os
+
+import yaml
+
+from ..actions.docker import DockerAction
+from ..constants import image_digests_node
+from ._internal import load_yaml_document
+
+
+def read_image_digests(root):
+    try:
+        document = load_yaml_document(image_digests_node(root))
+    except FileNotFoundError:
+        return {}
+    if not type(document) is dict:
+        raise ValueError("Image digests file is invalid")
+    return document
+
+
+def write_image_digests(root, digests):
+    content = yaml.safe_dump(digests, default_flow_style=False)
+    path = image_digests_node(root)
+    temporary_path = "{path}.{pid}".format(path=path, pid=os.getpid())
+    with open(temporary_path, "w") as handle:
+        handle.write(content)
+    os.replace(temporary_path, path)
+
+
+def apply_image_digests(root, packages):
+    digests = read_image_digests(root)
+    for package in packages.values():
+        for target in package.targets.values():
+            for action in target.find_actions(DockerAction):
+                action.digest = digests.get(action.image)
@@ -0,0 +1,66 @@
+import os
+import time
+
+from ..constants import TARGET_SUBSTITUTION_TOKEN, lock_node, root_node
+from .lock import WorkspaceReadLock
+from .reference import Reference, resolve_mount
+from .reference_table import lookup_reference_table
+from .scheduling import Scheduling
+from .snapshot import export_latest_workspace_snapshot
+from .usage_log import record_usage
+
+# Shims invoke "sashimmi --root=ROOT run REFERENCE ..." on every call; targets
+# with a current direct record in the reference table are executed from here
+# without importing yaml, argparse or the subcommand registry.
+
+
+def find_reference_record(root, reference):
+    with WorkspaceReadLock(lock_node(root)) as lock:
+        record = lookup_reference_table(root, reference)
+    return record, lock.wait_time
+
+
+def is_launchable(record, arguments):
+    if record is None or not record.direct or not record.arguments:
+        return False
+    if not arguments:
+        return True
+    # run substitutes caller arguments like the target's own; only those
+    # without substitution tokens can be appended verbatim.
+    return record.appends_arguments and not any(
+        TARGET_SUBSTITUTION_TOKEN in argument for argument in arguments
+    )
+
+
+def exec_reference_record(
+    root, reference, record, arguments, started, lock_wait
+):
+    record_usage(
+        root, reference, time.monotonic() - started, lock_wait, "table"
+    )
+    export_latest_workspace_snapshot(root)
+    environment = os.environ.copy()
+    environment.update(record.variables)
+    Scheduling.make_from_document(record.scheduling).apply()
+    arguments = record.arguments + arguments
+    os.execvpe(arguments[0], arguments, environment)
+
+
+def launch_from_reference_table(root, argument, arguments):
+    started = time.monotonic()
+    if not os.path.isdir(root_node(root)):
+        return
+    try:
+        root, reference = resolve_mount(root, Reference.make(argument, root))
+    except (KeyError, ValueError):
+        return
+    if not reference.target_name:
+        return
+    try:
+        record, lock_wait = find_reference_record(root, reference)
+    except OSError:
+        return
+    if is_launchable(record, arguments):
+        exec_reference_record(
+            root, reference, record, arguments, started, lock_wait
+        )
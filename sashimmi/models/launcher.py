@@ -0,0 +1,127 @@
+import importlib.util
+import json
+import marshal
+import os
+import sys
+import zipfile
+
+from .sources import package_directory, source_hash
+from ..constants import launcher_node
+
+# Launcher shims skip bash, the PATH lookup for the console script and the
+# site module: the recorded interpreter runs in isolated mode (-I) without
+# site (-S) against a zip archive of precompiled sashimmi modules.
+LAUNCHER_TEMPLATE = """\
+#!{interpreter} -IS
+import sys
+sys.path[0:0] = {path!r}
+sys.argv[0:1] = {arguments!r}
+from sashimmi.__main__ import main
+main()
+"""
+
+# Modules sashimmi imports from outside the standard library. Their parent
+# directories are put on the launcher's path because -S leaves site-packages
+# out of it.
+_DEPENDENCIES = ["yaml"]
+
+
+def _dependency_paths():
+    paths = []
+    for name in _DEPENDENCIES:
+        module = __import__(name)
+        path = os.path.dirname(
+            os.path.dirname(os.path.abspath(module.__file__))
+        )
+        if path not in paths:
+            paths.append(path)
+    return paths
+
+
+def _compile_module(path, name):
+    with open(path, "rb") as handle:
+        source = handle.read()
+    stat = os.stat(path)
+    # Timestamp-based pyc header; zipimport does not re-validate it because
+    # the archive carries no sources.
+    return b"".join([
+        importlib.util.MAGIC_NUMBER,
+        (0).to_bytes(4, "little"),
+        (int(stat.st_mtime) & 0xFFFFFFFF).to_bytes(4, "little"),
+        (len(source) & 0xFFFFFFFF).to_bytes(4, "little"),
+        marshal.dumps(compile(source, name, "exec", dont_inherit=True)),
+    ])
+
+
+def _launcher_metadata():
+    return {"source_hash": source_hash(), "interpreter": sys.executable}
+
+
+def read_launcher_metadata(path):
+    # What the archive was built from, kept in the zip comment.
+    with zipfile.ZipFile(path) as archive:
+        return json.loads(archive.comment.decode("utf-8"))
+
+
+def find_launcher_archive_drift(root):
+    try:
+        metadata = read_launcher_metadata(launcher_node(root))
+    except FileNotFoundError:
+        return "missing"
+    except (OSError, ValueError, zipfile.BadZipFile):
+        return "not a launcher archive"
+    if metadata.get("interpreter") != sys.executable:
+        return "built for interpreter {interpreter}".format(
+            interpreter=metadata.get("interpreter")
+        )
+    if metadata.get("source_hash") != source_hash():
+        return "built from other sashimmi sources"
+    return None
+
+
+def write_launcher_archive(root):
+    directory = package_directory()
+    base = os.path.dirname(directory)
+    path = launcher_node(root)
+    temporary_path = "{path}.{pid}".format(path=path, pid=os.getpid())
+    try:
+        with zipfile.ZipFile(temporary_path, "w") as archive:
+            archive.comment = json.dumps(_launcher_metadata()).encode("utf-8")
+            for dirpath, dirnames, filenames in os.walk(directory):
+                dirnames[:] = sorted(
+                    name for name in dirnames if name != "__pycache__"
+                )
+                # Explicit directory entries let zipimport resolve the
+                # namespace packages, which have no __init__ module.
+                archive.writestr(
+                    os.path.relpath(dirpath, start=base) + "/", b""
+                )
+                for filename in sorted(filenames):
+                    if not filename.endswith(".py"):
+                        continue
+                    module_path = os.path.join(dirpath, filename)
+                    name = os.path.relpath(module_path, start=base)
+                    archive.writestr(
+                        name + "c", _compile_module(module_path, name)
+                    )
+        os.replace(temporary_path, path)
+    except BaseException:
+        try:
+            os.unlink(temporary_path)
+        except OSError:
+            pass
+        raise
+    return path
+
+
+def make_launcher_script(root, archive, reference):
+    return LAUNCHER_TEMPLATE.format(
+        interpreter=sys.executable,
+        path=[archive] + _dependency_paths(),
+        arguments=[
+            "sashimmi",
+            "--root={root}".format(root=root),
+            "run",
+            str(reference),
+        ],
+    )
@@ -0,0 +1,59 @@
+import abc
+import fcntl
+import os
+import stat
+import time
+
+
+class WorkspaceLockBase(metaclass=abc.ABCMeta):
+    def __init__(self, name):
+        self.name = name
+        self.fd = None
+        self.wait_time = 0.0
+
+    def __enter__(self):
+        self.fd = self.open(self.name)
+        os.chmod(
+            self.name,
+            stat.S_ISGID | stat.S_ENFMT | stat.S_IRUSR | stat.S_IWUSR |
+            stat.S_IRGRP | stat.S_IWGRP | stat.S_IROTH,
+        )
+        started = time.monotonic()
+        self.lock(self.fd)
+        self.wait_time = time.monotonic() - started
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        self.fd.close()
+        self.fd = None
+
+    @abc.abstractmethod
+    def open(self, name):
+        pass
+
+    @abc.abstractmethod
+    def lock(self, fd):
+        pass
+
+
+class WorkspaceReadLock(WorkspaceLockBase):
+    def __init__(self, name):
+        super().__init__(name)
+
+    def open(self, name):
+        return open(name, "r")
+
+    def lock(self, fd):
+        fcntl.flock(fd, fcntl.LOCK_SH)
+
+
+class WorkspaceWriteLock(WorkspaceLockBase):
+    def __init__(self, name):
+        super().__init__(name)
+
+    def open(self, name):
+        return open(name, "w")
+
+    def lock(self, fd):
+        fcntl.flock(fd, fcntl.LOCK_EX)
@@ -0,0 +1,133 @@
+import os
+import pathlib
+
+from ..constants import (
+    bin_node,
+    multi_bin_node,
+    multi_shims_node,
+    multi_shim_node,
+)
+from .shim import (
+    BIND_MODE_DISPATCHER,
+    check_dispatcher_shim_names,
+    delete_file_or_dir,
+    read_bind_mode,
+    replace_link,
+    sha256,
+)
+from .verify import find_bin_drift
+
+
+class MultiBindResult:
+    def __init__(self):
+        self.bin_changes = 0
+        self.created = 0
+        self.removed = 0
+        self.unchanged = 0
+
+
+def _scan_bound_entries(entries):
+    # One pass over the multi namespace for all workspaces: name -> entries
+    # of the batch workspaces currently bound under that name.
+    bound = {}
+    multi_shims_root = multi_shims_node()
+    for name in os.listdir(multi_shims_root):
+        for entry in os.listdir(os.path.join(multi_shims_root, name)):
+            if entry in entries:
+                bound.setdefault(name, set()).add(entry)
+    return bound
+
+
+def _bind_multi_entries(desired, bound, result):
+    for name, targets in sorted(desired.items()):
+        multi_shim_root = multi_shim_node(name)
+        pathlib.Path(multi_shim_root).mkdir(exist_ok=True)
+        for entry, shim_file in targets.items():
+            path = os.path.join(multi_shim_root, entry)
+            try:
+                current = os.readlink(path)
+            except OSError:
+                current = None
+            if current == shim_file:
+                result.unchanged += 1
+                continue
+            replace_link(path, shim_file)
+            result.created += 1
+    for name, entries in sorted(bound.items()):
+        for entry in sorted(entries - set(desired.get(name, {}))):
+            delete_file_or_dir(os.path.join(multi_shim_node(name), entry))
+            result.removed += 1
+
+
+def _multi_bin_candidates(name, preferred):
+    # Entries of the batch, in the order the workspaces were given, come
+    # before entries other workspaces bound under the same name.
+    multi_shim_root = multi_shim_node(name)
+    try:
+        others = sorted(set(os.listdir(multi_shim_root)) - set(preferred))
+    except FileNotFoundError:
+        return
+    for entry in preferred + others:
+        path = os.path.join(multi_shim_root, entry)
+        if os.path.exists(path):
+            yield path
+
+
+def _bind_multi_bin(names, desired, result):
+    for name in sorted(names):
+        multi_bin_file = os.path.join(multi_bin_node(), name)
+        try:
+            current = os.readlink(multi_bin_file)
+        except OSError:
+            current = None
+        if (
+            current is not None
+            and os.path.dirname(current) == multi_shim_node(name)
+            and os.path.exists(multi_bin_file)
+        ):
+            result.unchanged += 1
+            continue
+        candidate = next(
+            _multi_bin_candidates(name, list(desired.get(name, {}))), None
+        )
+        if candidate is not None:
+            replace_link(multi_bin_file, candidate)
+            result.created += 1
+        elif os.path.lexists(multi_bin_file):
+            delete_file_or_dir(multi_bin_file)
+            result.removed += 1
+
+
+def bind_multi_workspaces(shims_by_root, make_multi_lock):
+    # The caller holds the write lock of every workspace in shims_by_root,
+    # which keeps their bin directories and multi entries stable between the
+    # scan and the locked update. Only links that differ from the combined
+    # state are touched.
+    result = MultiBindResult()
+    modes = {root: read_bind_mode(root) for root in shims_by_root}
+    # Checked for every workspace before anything is touched; a dispatcher
+    # shim named like the dispatcher would be repaired into a link to itself.
+    for root, shims in shims_by_root.items():
+        if modes[root] == BIND_MODE_DISPATCHER:
+            check_dispatcher_shim_names(shims)
+    entries = {sha256(root): root for root in shims_by_root}
+
+    desired = {}
+    for root, shims in shims_by_root.items():
+        entry = sha256(root)
+        for name in shims:
+            desired.setdefault(name, {})[entry] = os.path.join(
+                bin_node(root), name
+            )
+    bound = _scan_bound_entries(entries)
+    names = set(desired) | set(bound)
+
+    for root, shims in shims_by_root.items():
+        for drift in find_bin_drift(root, shims, modes[root]):
+            drift.repair()
+            result.bin_changes += 1
+
+    with make_multi_lock(names):
+        _bind_multi_entries(desired, bound, result)
+        _bind_multi_bin(names, desired, result)
+    return result
@@ -0,0 +1,190 @@
+import fcntl
+import glob
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+import tempfile
+
+from ..constants import (
+    SASHIMMI_CACHE_MAX_SIZE,
+    cache_node,
+    cache_outputs_node,
+    cache_stats_node,
+)
+
+_CACHE_FILES_NODE = "files"
+
+
+def _hash_file(sha256, path):
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            sha256.update(chunk)
+
+
+def _expand_inputs(base, patterns):
+    paths = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(base, pattern), recursive=True):
+            if os.path.isfile(path):
+                paths.add(os.path.relpath(path, start=base))
+    return sorted(paths)
+
+
+def _entry_size(path):
+    size = 0
+    for dirpath, _dirnames, filenames in os.walk(path):
+        for f in filenames:
+            size += os.lstat(os.path.join(dirpath, f)).st_size
+    return size
+
+
+def _copy(source, destination):
+    pathlib.Path(os.path.dirname(destination)).mkdir(
+        parents=True, exist_ok=True
+    )
+    if os.path.isdir(destination) and not os.path.islink(destination):
+        shutil.rmtree(destination)
+    if os.path.isdir(source) and not os.path.islink(source):
+        shutil.copytree(source, destination, symlinks=True)
+    else:
+        shutil.copy2(source, destination, follow_symlinks=False)
+
+
+class OutputCache:
+    def __init__(self, root, max_size=SASHIMMI_CACHE_MAX_SIZE):
+        self.root = root
+        self.max_size = max_size
+
+    @property
+    def node(self):
+        return cache_outputs_node(self.root)
+
+    def entry_node(self, key):
+        return os.path.join(self.node, key)
+
+    def key(self, base, inputs, outputs, arguments, variables):
+        sha256 = hashlib.sha256()
+        sha256.update(
+            json.dumps({
+                "arguments": arguments,
+                "variables": sorted(variables.items()),
+                "outputs": [
+                    os.path.relpath(os.path.join(base, output), self.root)
+                    for output in outputs
+                ],
+            }).encode("utf-8")
+        )
+        for path in _expand_inputs(base, inputs):
+            sha256.update(b"\0")
+            sha256.update(path.encode("utf-8"))
+            sha256.update(b"\0")
+            _hash_file(sha256, os.path.join(base, path))
+        return sha256.hexdigest()
+
+    def restore(self, key, base, outputs):
+        entry = self.entry_node(key)
+        files = os.path.join(entry, _CACHE_FILES_NODE)
+        if not os.path.isdir(files):
+            return False
+        for output in outputs:
+            cached = os.path.join(files, output)
+            if not os.path.lexists(cached):
+                return False
+        for output in outputs:
+            _copy(os.path.join(files, output), os.path.join(base, output))
+        os.utime(entry)
+        return True
+
+    def store(self, key, base, outputs):
+        for output in outputs:
+            if not os.path.lexists(os.path.join(base, output)):
+                raise FileNotFoundError(
+                    "Declared output '{output}' was not produced".format(
+                        output=output
+                    )
+                )
+
+        pathlib.Path(self.node).mkdir(parents=True, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.node)
+        try:
+            for output in outputs:
+                _copy(
+                    os.path.join(base, output),
+                    os.path.join(staging, _CACHE_FILES_NODE, output),
+                )
+            size = _entry_size(staging)
+            if size > self.max_size:
+                logging.info(
+                    "Not caching outputs of %d bytes above the cache limit of %d bytes",
+                    size,
+                    self.max_size,
+                )
+                shutil.rmtree(staging)
+                return
+            try:
+                os.rename(staging, self.entry_node(key))
+            except OSError:
+                # Another invocation stored an identical entry first.
+                shutil.rmtree(staging)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        self.evict(keep=key)
+
+    def __entries(self):
+        if not os.path.isdir(self.node):
+            return []
+        entries = []
+        for name in os.listdir(self.node):
+            if name.startswith("."):
+                continue
+            path = self.entry_node(name)
+            entries.append((os.stat(path).st_mtime, _entry_size(path), path))
+        return entries
+
+    def usage(self):
+        entries = self.__entries()
+        return len(entries), sum(entry[1] for entry in entries)
+
+    def evict(self, max_size=None, keep=None):
+        max_size = self.max_size if max_size is None else max_size
+        entries = self.__entries()
+        total = sum(entry[1] for entry in entries)
+        removed = 0
+        for _mtime, size, path in sorted(entries):
+            if total <= max_size:
+                break
+            if keep is not None and path == self.entry_node(keep):
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def record(self, hit):
+        pathlib.Path(cache_node(self.root)).mkdir(parents=True, exist_ok=True)
+        with open(cache_stats_node(self.root), "a+") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            handle.seek(0)
+            content = handle.read()
+            stats = json.loads(content) if content else {}
+            field = "hits" if hit else "misses"
+            stats[field] = stats.get(field, 0) + 1
+            handle.seek(0)
+            handle.truncate()
+            handle.write(json.dumps(stats))
+            fcntl.flock(handle, fcntl.LOCK_UN)
+        return stats.get("hits", 0), stats.get("misses", 0)
+
+    def stats(self):
+        try:
+            with open(cache_stats_node(self.root), "r") as handle:
+                fcntl.flock(handle, fcntl.LOCK_SH)
+                content = handle.read()
+        except FileNotFoundError:
+            content = ""
+        stats = json.loads(content) if content else {}
+        return stats.get("hits", 0), stats.get("misses", 0)
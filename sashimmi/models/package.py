@@ -1,7 +1,7 @@
 import os
 
 from ..constants import PACKAGE_WILDCARD_TOKEN, RECURSIVE_WILDCARD_TOKEN
-from ._internal import load_yaml_document
+from ._internal import load_yaml_content
 from .target import Target
 from .reference import Reference
 from .validation import validate_target_name_charset
@@ -19,10 +19,7 @@ def _validate_package_target_name(name, reference):
 
 class Package:
     @staticmethod
-    def __load_targets(root, reference):
-        document = load_yaml_document(
-            os.path.join(root, reference.package_node_path)
-        )
+    def __load_targets(document, reference):
         names = set()
         for target in document.get("targets", []):
             if "name" not in target:
@@ -41,14 +38,36 @@ class Package:
                 )
             names.add(name)
 
-            yield Reference(reference.package_path, name), target
+            yield Reference(
+                reference.package_path, name, mount_path=reference.mount_path
+            ), target
+
+    @staticmethod
+    def make(root, package_reference, parse_cache=None):
+        node = os.path.join(root, package_reference.package_node_path)
+        with open(node, "rb") as handle:
+            content = handle.read()
+
+        if parse_cache:
+            key = parse_cache.key(package_reference, content)
+            package = parse_cache.load(key)
+            if package:
+                return package
+
+        package = Package.make_from_document(
+            package_reference, load_yaml_content(content)
+        )
+
+        if parse_cache:
+            parse_cache.store(key, package)
+        return package
 
     @staticmethod
-    def make(root, package_reference):
+    def make_from_document(package_reference, document):
         targets = {
             target_reference: Target.make(package_reference, target_yml)
             for target_reference, target_yml in
-            Package.__load_targets(root, package_reference)
+            Package.__load_targets(document, package_reference)
         }
         return Package(None, package_reference, targets)
 
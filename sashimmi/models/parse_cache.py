@@ -0,0 +1,114 @@
+import hashlib
+import os
+import pathlib
+import pickle
+import time
+
+from .sources import source_hash
+from ..constants import SASHIMMI_PARSE_CACHE_MAX_SIZE, parse_cache_node
+
+# Entries are pickled model objects, so keys also cover the sashimmi sources
+# that define them.
+_PARSE_CACHE_VERSION = b"5"
+
+# Hits only refresh an entry's mtime for LRU purposes once per interval, so a
+# warm cache does not turn every load into a metadata write.
+_TOUCH_INTERVAL = 24 * 60 * 60
+
+
+class ParseCache:
+    def __init__(self, node=None, max_size=SASHIMMI_PARSE_CACHE_MAX_SIZE):
+        self.node = node if node else parse_cache_node()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def key(self, package_reference, content):
+        sha256 = hashlib.sha256()
+        sha256.update(_PARSE_CACHE_VERSION)
+        sha256.update(b"\0")
+        sha256.update(source_hash().encode("utf-8"))
+        sha256.update(b"\0")
+        sha256.update(package_reference.mount_path.encode("utf-8"))
+        sha256.update(b"\0")
+        sha256.update(package_reference.package_path.encode("utf-8"))
+        sha256.update(b"\0")
+        sha256.update(content)
+        return sha256.hexdigest()
+
+    def entry_node(self, key):
+        return os.path.join(self.node, key[:2], key)
+
+    def load(self, key):
+        path = self.entry_node(key)
+        try:
+            with open(path, "rb") as handle:
+                package = pickle.load(handle)
+        except Exception:
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            if time.time() - os.stat(path).st_mtime > _TOUCH_INTERVAL:
+                os.utime(path)
+        except OSError:
+            pass
+        return package
+
+    def store(self, key, package):
+        path = self.entry_node(key)
+        temporary_path = "{path}.{pid}".format(path=path, pid=os.getpid())
+        try:
+            pathlib.Path(os.path.dirname(path)).mkdir(
+                parents=True, exist_ok=True
+            )
+            with open(temporary_path, "wb") as handle:
+                pickle.dump(package, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary_path, path)
+        except (OSError, pickle.PicklingError):
+            try:
+                os.unlink(temporary_path)
+            except OSError:
+                pass
+            return
+        self.stores += 1
+
+    def entries(self):
+        if not os.path.isdir(self.node):
+            return
+        for shard in os.listdir(self.node):
+            shard_node = os.path.join(self.node, shard)
+            if not os.path.isdir(shard_node):
+                continue
+            for name in os.listdir(shard_node):
+                path = os.path.join(shard_node, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    def stats(self):
+        count = 0
+        size = 0
+        for _path, _mtime, entry_size in self.entries():
+            count += 1
+            size += entry_size
+        return count, size
+
+    def evict(self, max_size=None):
+        max_size = self.max_size if max_size is None else max_size
+        entries = sorted(self.entries(), key=lambda entry: entry[1])
+        total = sum(entry[2] for entry in entries)
+        removed = 0
+        for path, _mtime, size in entries:
+            if total <= max_size:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,234 @@
+import contextlib
+import json
+import logging
+import os
+import pathlib
+import time
+
+from ..constants import pending_node
+from .reference import Reference, mount_root
+from .shim import Shim, read_shims_node, write_shims_node, bind_shims
+
+_REQUEST_SUFFIX = ".request"
+_RESULT_SUFFIX = ".result"
+
+
+class ShimChanges:
+    def __init__(
+        self, installs=None, uninstalls=None, force=False, multi=False
+    ):
+        self.installs = installs if installs else []
+        self.uninstalls = uninstalls if uninstalls else []
+        self.force = force
+        self.multi = multi
+
+    def to_json(self):
+        return {
+            "installs": self.installs,
+            "uninstalls": self.uninstalls,
+            "force": self.force,
+            "multi": self.multi,
+        }
+
+    @staticmethod
+    def from_json(document):
+        return ShimChanges(
+            installs=[tuple(entry) for entry in document["installs"]],
+            uninstalls=[tuple(entry) for entry in document["uninstalls"]],
+            force=document["force"],
+            multi=document["multi"],
+        )
+
+    def apply(self, root, shims):
+        shims = shims.copy()
+        messages = []
+        for name, reference in self.installs:
+            if name in shims:
+                if not self.force:
+                    raise ValueError(
+                        "Shim '{name}' is already installed".format(name=name)
+                    )
+                messages.append((
+                    "WARNING",
+                    "Overwriting shim '{name}' with target '{reference}'".
+                    format(name=name, reference=reference),
+                ))
+            else:
+                messages.append((
+                    "INFO",
+                    "Installing shim '{name}' with target '{reference}'".
+                    format(name=name, reference=reference),
+                ))
+            shims[name] = Shim(name, Reference.make(reference, root, root))
+        for name, reference in self.uninstalls:
+            if name in shims:
+                messages.append((
+                    "INFO",
+                    "Uninstalling shim '{name}' with target '{reference}'".
+                    format(name=name, reference=reference),
+                ))
+                del shims[name]
+            else:
+                messages.append((
+                    "DEBUG",
+                    "Skipping missing shim '{name}' with target '{reference}'".
+                    format(name=name, reference=reference),
+                ))
+        return shims, messages
+
+
+def _request_node(root, request_id):
+    return os.path.join(pending_node(root), request_id + _REQUEST_SUFFIX)
+
+
+def _result_node(root, request_id):
+    return os.path.join(pending_node(root), request_id + _RESULT_SUFFIX)
+
+
+def _write_json_atomically(path, document):
+    temporary_path = "{directory}/.{name}.tmp".format(
+        directory=os.path.dirname(path), name=os.path.basename(path)
+    )
+    with open(temporary_path, "w") as handle:
+        json.dump(document, handle)
+    os.replace(temporary_path, path)
+
+
+def _read_json(path):
+    with open(path, "r") as handle:
+        return json.load(handle)
+
+
+def enqueue_shim_changes(root, changes):
+    pathlib.Path(pending_node(root)).mkdir(exist_ok=True)
+    request_id = "{time:020d}-{pid}".format(
+        time=time.time_ns(), pid=os.getpid()
+    )
+    _write_json_atomically(_request_node(root, request_id), changes.to_json())
+    return request_id
+
+
+def discard_shim_changes(root, request_id):
+    for path in (
+        _request_node(root, request_id),
+        _result_node(root, request_id),
+    ):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def take_shim_changes_result(root, request_id):
+    path = _result_node(root, request_id)
+    document = _read_json(path)
+    os.unlink(path)
+    for level, message in document["messages"]:
+        logging.log(logging.getLevelName(level), "%s", message)
+    if document["error"]:
+        raise ValueError(document["error"])
+    if document.get("bind_error"):
+        raise RuntimeError(
+            "Shim changes were saved but binding them failed: {error}".format(
+                error=document["bind_error"]
+            )
+        )
+
+
+def _writer_is_alive(request_id):
+    # Request ids end with the pid of the process waiting for the result.
+    pid = int(request_id.rpartition("-")[2])
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _sweep_orphaned_results(root, entries):
+    for entry in entries:
+        if entry.endswith(_RESULT_SUFFIX):
+            request_id = entry[:-len(_RESULT_SUFFIX)]
+            if not _writer_is_alive(request_id):
+                discard_shim_changes(root, request_id)
+
+
+def _mount_paths(root, changes):
+    return {
+        Reference.make(reference, root, root).mount_path
+        for _name, reference in changes.installs
+    } - {""}
+
+
+def commit_pending_shim_changes(root, make_multi_lock, make_mount_lock):
+    node = pending_node(root)
+    if not os.path.isdir(node):
+        return
+    entries = os.listdir(node)
+    _sweep_orphaned_results(root, entries)
+    request_ids = []
+    for entry in sorted(entries):
+        if entry.endswith(_REQUEST_SUFFIX):
+            request_id = entry[:-len(_REQUEST_SUFFIX)]
+            if _writer_is_alive(request_id):
+                request_ids.append(request_id)
+            else:
+                # Nobody is left to take the result of a request whose
+                # caller died after enqueueing it.
+                discard_shim_changes(root, request_id)
+    if not request_ids:
+        return
+
+    shims = read_shims_node(root)
+    results = {}
+    multi = False
+    mount_paths = set()
+    for request_id in request_ids:
+        try:
+            changes = ShimChanges.from_json(
+                _read_json(_request_node(root, request_id))
+            )
+        except FileNotFoundError:
+            # The requesting process gave up before its changes were applied.
+            continue
+        try:
+            shims, messages = changes.apply(root, shims)
+        except (KeyError, ValueError) as error:
+            results[request_id] = {"messages": [], "error": str(error)}
+        else:
+            results[request_id] = {"messages": messages, "error": None}
+            multi = multi or changes.multi
+            mount_paths |= _mount_paths(root, changes)
+
+    # Mounts holding installed targets are locked after the workspace, in
+    # mount path order, so they cannot change while shims into them are
+    # written. A failed write persists nothing and fails every request. Once
+    # the shims node is written the changes are kept, so a failed bind is
+    # reported to every caller on its own and left for "verify --repair".
+    try:
+        with contextlib.ExitStack() as stack:
+            try:
+                for mount_path in sorted(mount_paths):
+                    stack.enter_context(
+                        make_mount_lock(mount_root(root, mount_path))
+                    )
+                write_shims_node(root, shims)
+            except Exception as error:
+                for result in results.values():
+                    result["error"] = result["error"] or str(error)
+                raise
+            try:
+                bind_shims(root, shims, make_multi_lock if multi else None)
+            except Exception as error:
+                for result in results.values():
+                    if not result["error"]:
+                        result["bind_error"] = str(error)
+    finally:
+        for request_id, result in results.items():
+            _write_json_atomically(_result_node(root, request_id), result)
+            try:
+                os.unlink(_request_node(root, request_id))
+            except FileNotFoundError:
+                pass
@@ -3,6 +3,7 @@ import os
 
 from ..constants import (
     SASHIMMI_PACKAGE_NODE,
+    root_node,
     ROOT_ANCHOR_TOKEN,
     REFERENCE_PATH_SEPARATOR_TOKEN,
     REFERENCE_PART_SEPARATOR_TOKEN,
@@ -39,6 +40,20 @@ def _canonicalize_package_path(argument, root, cwd):
     return "" if normalized == "." else normalized
 
 
+def _canonicalize_mount_path(argument, mount_parts):
+    for part in mount_parts:
+        normalized = os.path.normpath(part) if part else "."
+        if (
+            normalized in (".", "..") or normalized.startswith("../")
+            or os.path.isabs(normalized)
+        ):
+            raise ValueError(
+                "Reference argument {argument} contains an invalid mount path".
+                format(argument=argument)
+            )
+        yield normalized
+
+
 class Reference:
     class Wildcard(enum.Enum):
         PACKAGE_WILDCARD = 1
@@ -70,6 +85,24 @@ class Reference:
         non_wildcard_package_part = package_part.partition(
             RECURSIVE_WILDCARD_TOKEN
         )[0]
+
+        # "//vendor/x//pkg:target" names //pkg:target in the workspace rooted
+        # at vendor/x; every further "//" descends into another mount.
+        anchored = non_wildcard_package_part.startswith(ROOT_ANCHOR_TOKEN)
+        if anchored:
+            non_wildcard_package_part = non_wildcard_package_part[
+                len(ROOT_ANCHOR_TOKEN):]
+        parts = non_wildcard_package_part.split(ROOT_ANCHOR_TOKEN)
+        mount_parts = parts[:-1]
+        if mount_parts and not anchored:
+            mount_parts[0] = _canonicalize_package_path(
+                mount_parts[0], root, cwd
+            )
+        mount_path = ROOT_ANCHOR_TOKEN.join(
+            _canonicalize_mount_path(argument, mount_parts)
+        )
+        if mount_path or anchored:
+            non_wildcard_package_part = ROOT_ANCHOR_TOKEN + parts[-1]
         package_path = _canonicalize_package_path(
             non_wildcard_package_part, root, cwd
         )
@@ -82,14 +115,25 @@ class Reference:
         else:
             wildcard = None
 
-        return Reference(package_path, target_name, wildcard=wildcard)
+        return Reference(
+            package_path, target_name, wildcard=wildcard, mount_path=mount_path
+        )
 
-    def __init__(self, package_path, target_name, wildcard=None):
+    def __init__(
+        self, package_path, target_name, wildcard=None, mount_path=""
+    ):
         self.package_path = package_path
         self.target_name = target_name
         self.wildcard = wildcard
+        self.mount_path = mount_path
 
     def __str__(self):
+        if self.mount_path:
+            return "{anchor}{mount_path}{local}".format(
+                anchor=ROOT_ANCHOR_TOKEN,
+                mount_path=self.mount_path,
+                local=self.unmounted(),
+            )
         if self.target_name:
             return "{anchor}{package_path}{separator}{target_name}".format(
                 anchor=ROOT_ANCHOR_TOKEN,
@@ -131,20 +175,40 @@ class Reference:
 
     @property
     def package_part(self):
-        return Reference(self.package_path, None)
+        return Reference(self.package_path, None, mount_path=self.mount_path)
 
     @property
     def path(self):
         if self.target_name:
-            return os.path.join(self.package_path, self.target_name)
+            path = os.path.join(self.package_path, self.target_name)
         else:
-            return self.package_path
+            path = self.package_path
+        if self.mount_path:
+            return "{mount_path}{anchor}{path}".format(
+                mount_path=self.mount_path, anchor=ROOT_ANCHOR_TOKEN, path=path
+            )
+        return path
+
+    def unmounted(self):
+        return Reference(
+            self.package_path, self.target_name, wildcard=self.wildcard
+        )
+
+    def remount(self, mount_path):
+        return Reference(
+            self.package_path,
+            self.target_name,
+            wildcard=self.wildcard,
+            mount_path=mount_path,
+        )
 
     @property
     def package_node_path(self):
         return os.path.join(self.package_path, SASHIMMI_PACKAGE_NODE)
 
     def is_parent_of(self, other):
+        if self.mount_path != other.mount_path:
+            return False
         if self.package_path == "" and other.package_path != "":
             return True
         return other.package_path.startswith(
@@ -156,3 +220,20 @@ class Reference:
 
     def is_child_of(self, other):
         return other.is_parent_of(self)
+
+
+def mount_root(root, mount_path):
+    directory = os.path.join(root, *mount_path.split(ROOT_ANCHOR_TOKEN))
+    if not os.path.isdir(root_node(directory)):
+        raise KeyError(
+            "Workspace mount {mount} not found in {root}".format(
+                mount=mount_path, root=root
+            )
+        )
+    return directory
+
+
+def resolve_mount(root, reference):
+    if not reference.mount_path:
+        return root, reference
+    return mount_root(root, reference.mount_path), reference.unmounted()
@@ -0,0 +1,185 @@
+import json
+import mmap
+import os
+import struct
+
+from ..constants import SASHIMMI_DOCKER, reference_table_node
+
+# Layout: header, root path, fixed-size index entries sorted by key, then the
+# key and record blobs the entries point into. Records are JSON documents.
+_MAGIC = b"SASHRTB4"
+_HEADER = struct.Struct("<8sII")
+_ENTRY = struct.Struct("<QIQI")
+
+
+class ReferenceRecord:
+    def __init__(self, document):
+        self.node = document["node"]
+        self.node_mtime = document["node_mtime"]
+        self.node_size = document["node_size"]
+        self.direct = document["direct"]
+        self.arguments = document["arguments"]
+        self.appends_arguments = document["appends_arguments"]
+        self.variables = document["variables"]
+        self.scheduling = document["scheduling"]
+        self.docker = document["docker"]
+
+    def is_current(self, root):
+        # The docker command is baked into the recorded command line.
+        if self.docker is not None and self.docker != SASHIMMI_DOCKER:
+            return False
+        try:
+            stat = os.stat(os.path.join(root, self.node))
+        except OSError:
+            return False
+        return (
+            stat.st_mtime_ns == self.node_mtime
+            and stat.st_size == self.node_size
+        )
+
+
+# Stands in for caller arguments when checking where adapt places them; a
+# NUL byte cannot appear in a real argument.
+_PROBE_ARGUMENT = "\0"
+
+
+def _appends_arguments(target, arguments):
+    # Fast paths append caller arguments to the recorded command line, which
+    # is only what run does when adapt puts them last, e.g. not inside a
+    # container's shell command.
+    probed, _ = target.adapt([_PROBE_ARGUMENT], apply_substitutions=True)
+    return probed == arguments + [_PROBE_ARGUMENT]
+
+
+def _make_record(target, stat, direct):
+    # Imported here so the launch fast path does not load the action classes.
+    from ..actions.docker import DockerAction
+
+    if direct:
+        arguments, variables = target.adapt(apply_substitutions=True)
+        appends_arguments = _appends_arguments(target, arguments)
+    else:
+        arguments, variables = [], {}
+        appends_arguments = False
+    return json.dumps({
+        "node": target.package.node,
+        "node_mtime": stat.st_mtime_ns,
+        "node_size": stat.st_size,
+        "direct": direct,
+        "arguments": arguments,
+        "appends_arguments": appends_arguments,
+        "variables": variables,
+        "scheduling": target.scheduling.document(),
+        "docker": (
+            SASHIMMI_DOCKER if target.find_actions(DockerAction) else None
+        ),
+    }).encode("utf-8")
+
+
+def write_reference_table(workspace, is_direct):
+    entries = []
+    for package in workspace.packages.values():
+        stat = os.stat(package.absolute_node)
+        for target in package.targets.values():
+            entries.append((
+                target.reference.path.encode("utf-8"),
+                _make_record(target, stat, is_direct(target)),
+            ))
+    entries.sort(key=lambda entry: entry[0])
+
+    root = workspace.root.encode("utf-8")
+    offset = _HEADER.size + len(root) + _ENTRY.size * len(entries)
+    index = []
+    blobs = []
+    for key, record in entries:
+        index.append(
+            _ENTRY.pack(offset, len(key), offset + len(key), len(record))
+        )
+        blobs.append(key)
+        blobs.append(record)
+        offset += len(key) + len(record)
+
+    path = reference_table_node(workspace.root)
+    temporary_path = "{path}.{pid}".format(path=path, pid=os.getpid())
+    with open(temporary_path, "wb") as handle:
+        handle.write(_HEADER.pack(_MAGIC, len(entries), len(root)))
+        handle.write(root)
+        handle.write(b"".join(index))
+        handle.write(b"".join(blobs))
+    os.replace(temporary_path, path)
+
+
+class ReferenceTable:
+    def __init__(self, path):
+        self.path = path
+        self.mmap = None
+        self.count = 0
+        self.root = None
+        self.entries_offset = 0
+
+    def __enter__(self):
+        with open(self.path, "rb") as handle:
+            self.mmap = mmap.mmap(
+                handle.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        magic, self.count, root_length = _HEADER.unpack_from(self.mmap, 0)
+        if magic != _MAGIC:
+            self.mmap.close()
+            raise ValueError(
+                "Reference table {path} is invalid".format(path=self.path)
+            )
+        self.root = self.mmap[_HEADER.size:_HEADER.size + root_length].decode(
+            "utf-8"
+        )
+        self.entries_offset = _HEADER.size + root_length
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.mmap.close()
+        self.mmap = None
+
+    def __entry(self, position):
+        return _ENTRY.unpack_from(
+            self.mmap, self.entries_offset + position * _ENTRY.size
+        )
+
+    def find(self, key):
+        key = key.encode("utf-8")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, record_offset, record_length = self.__entry(
+                middle
+            )
+            candidate = self.mmap[key_offset:key_offset + key_length]
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                return ReferenceRecord(
+                    json.loads(
+                        self.mmap[record_offset:record_offset + record_length]
+                    )
+                )
+        return None
+
+
+def lookup_reference_table(root, reference):
+    try:
+        with ReferenceTable(reference_table_node(root)) as table:
+            if table.root != root:
+                return None
+            record = table.find(reference.path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if record is None or not record.is_current(root):
+        return None
+    return record
+
+
+def invalidate_reference_table(root):
+    try:
+        os.unlink(reference_table_node(root))
+    except FileNotFoundError:
+        pass
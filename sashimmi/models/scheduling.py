@@ -0,0 +1,272 @@
+import os
+import resource
+
+IONICE_CLASSES = {"realtime": 1, "best-effort": 2, "idle": 3}
+
+_IONICE_LEVELS = range(8)
+_IOPRIO_CLASS_SHIFT = 13
+_IOPRIO_WHO_PROCESS = 1
+_SYS_IOPRIO_SET = {
+    "x86_64": 251,
+    "i386": 289,
+    "i686": 289,
+    "aarch64": 30,
+    "riscv64": 30,
+    "armv7l": 314,
+    "ppc64le": 273,
+    "s390x": 282,
+}
+
+_RLIMIT_UNLIMITED = "unlimited"
+
+# Docker gives a container 1024 CPU shares by default; each niceness step
+# scales the CFS weight by about 1.25, so translate niceness the same way.
+_DOCKER_CPU_SHARES = 1024
+_DOCKER_MINIMUM_CPU_SHARES = 2
+
+
+def _warn(message, *arguments):
+    # Imported here so the reference table fast path does not pay for logging
+    # unless a hint cannot be applied.
+    import logging
+    logging.warning(message, *arguments)
+
+
+def _make_nice(yaml_node, target_reference):
+    nice = yaml_node.get("nice")
+    if nice is None:
+        return None
+    if type(nice) is not int or not -20 <= nice <= 19:
+        raise ValueError(
+            "Target {target} has invalid nice value '{nice}'; expected an integer from -20 to 19"
+            .format(target=target_reference, nice=nice)
+        )
+    return nice
+
+
+def _make_ionice(yaml_node, target_reference):
+    ionice = yaml_node.get("ionice")
+    if ionice is None:
+        return None
+    if type(ionice) is str:
+        ionice = {"class": ionice}
+    if type(ionice) is not dict or ionice.get("class") not in IONICE_CLASSES:
+        raise ValueError(
+            "Target {target} has invalid ionice class; expected one of {classes}"
+            .format(
+                target=target_reference,
+                classes=", ".join(sorted(IONICE_CLASSES)),
+            )
+        )
+    level = ionice.get("level", 4)
+    if type(level) is not int or level not in _IONICE_LEVELS:
+        raise ValueError(
+            "Target {target} has invalid ionice level '{level}'; expected an integer from 0 to 7"
+            .format(target=target_reference, level=level)
+        )
+    return [ionice["class"], level]
+
+
+def _parse_cpus(cpus, target_reference):
+    if type(cpus) is int:
+        cpus = [cpus]
+    if type(cpus) is str:
+        parsed = []
+        for part in cpus.split(","):
+            first, _, last = part.strip().partition("-")
+            try:
+                parsed += range(int(first), int(last if last else first) + 1)
+            except ValueError:
+                parsed = None
+                break
+        cpus = parsed
+    if (
+        type(cpus) is not list or not cpus
+        or any(type(cpu) is not int or cpu < 0 for cpu in cpus)
+    ):
+        raise ValueError(
+            "Target {target} has invalid cpus; expected a list of CPU numbers or a range like '0-3,6'"
+            .format(target=target_reference)
+        )
+    return sorted(set(cpus))
+
+
+def _make_rlimit_value(value, name, target_reference):
+    if value == _RLIMIT_UNLIMITED or (type(value) is int and value >= 0):
+        return value
+    raise ValueError(
+        "Target {target} has invalid value '{value}' for rlimit '{name}'".
+        format(target=target_reference, value=value, name=name)
+    )
+
+
+def _make_rlimits(yaml_node, target_reference):
+    rlimits = yaml_node.get("rlimits", {})
+    if type(rlimits) is not dict:
+        raise ValueError(
+            "Target {target} requires a mapping for attribute 'rlimits'".
+            format(target=target_reference)
+        )
+    limits = {}
+    for name, value in rlimits.items():
+        if not hasattr(resource, _rlimit_constant(name)):
+            raise ValueError(
+                "Target {target} has unknown rlimit '{name}'".format(
+                    target=target_reference, name=name
+                )
+            )
+        # A single value sets the soft limit and leaves the hard limit alone.
+        values = value if type(value) is list else [value]
+        if len(values) not in [1, 2]:
+            raise ValueError(
+                "Target {target} requires a value or a [soft, hard] pair for rlimit '{name}'"
+                .format(target=target_reference, name=name)
+            )
+        limits[name] = [
+            _make_rlimit_value(value, name, target_reference)
+            for value in values
+        ]
+    return limits
+
+
+def _rlimit_constant(name):
+    return "RLIMIT_{name}".format(name=str(name).upper())
+
+
+def _resource_value(value):
+    return resource.RLIM_INFINITY if value == _RLIMIT_UNLIMITED else value
+
+
+def _set_ioprio(ioprio_class, level):
+    number = _SYS_IOPRIO_SET.get(os.uname().machine)
+    if number is None:
+        _warn(
+            "Skipping ionice hint: no ioprio_set syscall known for %s",
+            os.uname().machine
+        )
+        return
+    import ctypes
+    libc = ctypes.CDLL(None, use_errno=True)
+    value = (IONICE_CLASSES[ioprio_class] << _IOPRIO_CLASS_SHIFT) | level
+    if libc.syscall(number, _IOPRIO_WHO_PROCESS, 0, value) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+
+
+class Scheduling:
+    @staticmethod
+    def make_from_yaml_node(yaml_node, target_reference):
+        if yaml_node is None:
+            return Scheduling()
+        if type(yaml_node) is not dict:
+            raise ValueError(
+                "Target {target} requires a mapping for attribute 'scheduling'"
+                .format(target=target_reference)
+            )
+        cpus = yaml_node.get("cpus")
+        return Scheduling(
+            nice=_make_nice(yaml_node, target_reference),
+            ionice=_make_ionice(yaml_node, target_reference),
+            cpus=None if cpus is None else _parse_cpus(cpus, target_reference),
+            rlimits=_make_rlimits(yaml_node, target_reference),
+        )
+
+    @staticmethod
+    def make_from_document(document):
+        return Scheduling(**document)
+
+    def __init__(self, nice=None, ionice=None, cpus=None, rlimits=None):
+        self.nice = nice
+        self.ionice = ionice
+        self.cpus = cpus
+        self.rlimits = rlimits if rlimits else {}
+
+    def __bool__(self):
+        return bool(
+            self.nice is not None or self.ionice or self.cpus or self.rlimits
+        )
+
+    def document(self):
+        document = {}
+        if self.nice is not None:
+            document["nice"] = self.nice
+        if self.ionice:
+            document["ionice"] = self.ionice
+        if self.cpus:
+            document["cpus"] = self.cpus
+        if self.rlimits:
+            document["rlimits"] = self.rlimits
+        return document
+
+    def apply(self):
+        # Hints only shape how the command is scheduled, so one that cannot be
+        # applied, e.g. a negative niceness without privileges, is reported
+        # and the command still runs.
+        if self.nice is not None:
+            # The hint is an absolute niceness; os.nice only adds to the one
+            # inherited from the caller.
+            try:
+                increment = self.nice - os.getpriority(os.PRIO_PROCESS, 0)
+                if increment:
+                    os.nice(increment)
+            except OSError as error:
+                _warn("Skipping nice hint %d: %s", self.nice, error)
+        if self.ionice:
+            try:
+                _set_ioprio(*self.ionice)
+            except OSError as error:
+                _warn("Skipping ionice hint %s: %s", self.ionice[0], error)
+        if self.cpus:
+            try:
+                os.sched_setaffinity(0, self.cpus)
+            except (AttributeError, OSError) as error:
+                _warn("Skipping cpus hint: %s", error)
+        for name, values in sorted(self.rlimits.items()):
+            constant = getattr(resource, _rlimit_constant(name))
+            try:
+                if len(values) > 1:
+                    hard = _resource_value(values[1])
+                else:
+                    hard = resource.getrlimit(constant)[1]
+                resource.setrlimit(constant, (_resource_value(values[0]), hard))
+            except (OSError, ValueError) as error:
+                _warn("Skipping rlimit hint %s: %s", name, error)
+
+    def docker_arguments(self):
+        arguments = []
+        if self.cpus:
+            arguments.append(
+                "--cpuset-cpus={cpus}".format(
+                    cpus=",".join(str(cpu) for cpu in self.cpus)
+                )
+            )
+        if self.nice is not None:
+            arguments.append(
+                "--cpu-shares={shares}".format(
+                    shares=max(
+                        _DOCKER_MINIMUM_CPU_SHARES,
+                        round(_DOCKER_CPU_SHARES / 1.25**self.nice),
+                    )
+                )
+            )
+        for name, values in sorted(self.rlimits.items()):
+            if len(values) == 1:
+                # Docker applies a single value to both limits; keep the hard
+                # limit this process has, as apply does natively.
+                hard = resource.getrlimit(
+                    getattr(resource, _rlimit_constant(name))
+                )[1]
+                values = values + [
+                    _RLIMIT_UNLIMITED if hard == resource.RLIM_INFINITY
+                    else hard
+                ]
+            arguments.append(
+                "--ulimit={name}={values}".format(
+                    name=name,
+                    values=":".join(
+                        "-1" if value == _RLIMIT_UNLIMITED else str(value)
+                        for value in values
+                    ),
+                )
+            )
+        return arguments
@@ -1,3 +1,4 @@
+import bisect
 import hashlib
 import os
 import pathlib
@@ -5,15 +6,26 @@ import shutil
 import stat
 
 from ..constants import (
+    SASHIMMI_DISPATCHER_NODE,
+    ROOT_ANCHOR_TOKEN,
+    REFERENCE_PATH_SEPARATOR_TOKEN,
     root_node,
     bin_node,
+    bind_mode_node,
+    dispatcher_node,
+    lock_node,
     shims_node,
+    shims_database_node,
     multi_bin_node,
     multi_shims_node,
     multi_shim_node,
 )
 from ._internal import load_yaml_document
+from .launcher import write_launcher_archive, make_launcher_script
+from .lock import WorkspaceReadLock
 from .reference import Reference
+from .shim_database import ShimDatabase
+from .shim_index import read_shims_index, write_shims_index
 
 SHIM_TEMPLATE = """\
 #!/usr/bin/env bash
@@ -21,6 +33,16 @@ set -euo pipefail
 exec sashimmi --root={root} run {reference} "$@"
 """
 
+DISPATCHER_TEMPLATE = """\
+#!/usr/bin/env bash
+set -euo pipefail
+exec sashimmi --root={root} dispatch "${{0##*/}}" "$@"
+"""
+
+BIND_MODE_SCRIPTS = "scripts"
+BIND_MODE_DISPATCHER = "dispatcher"
+BIND_MODE_LAUNCHER = "launcher"
+
 
 class Shim:
     def __init__(self, name, reference):
@@ -28,42 +50,62 @@ class Shim:
         self.reference = reference
 
 
-def _delete_file_or_dir(path):
+def delete_file_or_dir(path):
     if os.path.isdir(path):
         shutil.rmtree(path)
     else:
         os.unlink(path)
 
 
+def replace_link(path, target):
+    if os.path.lexists(path):
+        delete_file_or_dir(path)
+    os.symlink(target, path)
+
+
 def _delete_all_shim_files(bin_root):
     for entry in os.listdir(bin_root):
-        _delete_file_or_dir(os.path.join(bin_root, entry))
+        delete_file_or_dir(os.path.join(bin_root, entry))
 
 
-def _delete_all_multishim_files(bin_root):
+def bound_multishim_names(root):
+    entry = sha256(root)
     multi_shims_root = multi_shims_node()
-    for shim_name in os.listdir(multi_shims_root):
-        for entry in os.listdir(os.path.join(multi_shims_root, shim_name)):
-            entry_path = os.path.join(multi_shims_root, shim_name, entry)
-            destination = os.readlink(entry_path)
-            if destination.startswith(bin_root):
-                _delete_file_or_dir(entry_path)
-
-    multi_bin_root = multi_bin_node()
-    for entry in os.listdir(multi_bin_root):
-        entry_path = os.path.join(multi_bin_root, entry)
-        destination = os.readlink(entry_path)
-        if not os.path.exists(destination):
-            _delete_file_or_dir(entry_path)
-
-
-def _sha256(content):
+    return {
+        shim_name for shim_name in os.listdir(multi_shims_root)
+        if os.path.lexists(os.path.join(multi_shims_root, shim_name, entry))
+    }
+
+
+def delete_multishim_files(root, names):
+    entry = sha256(root)
+    for shim_name in names:
+        entry_path = os.path.join(multi_shim_node(shim_name), entry)
+        if os.path.lexists(entry_path):
+            delete_file_or_dir(entry_path)
+
+        multi_bin_file = os.path.join(multi_bin_node(), shim_name)
+        if os.path.lexists(multi_bin_file) and not os.path.exists(
+            multi_bin_file
+        ):
+            delete_file_or_dir(multi_bin_file)
+
+
+def sha256(content):
     sha256 = hashlib.sha256()
     sha256.update(content.encode("utf-8"))
     return sha256.hexdigest()
 
 
-def read_shims_node(root):
+def _package_key(reference):
+    return reference.package_part.path
+
+
+def shims_database_enabled(root):
+    return os.path.exists(shims_database_node(root))
+
+
+def _read_shims_yaml(root):
     document = load_yaml_document(shims_node(root))
     if document is None:
         return {}
@@ -75,36 +117,247 @@ def read_shims_node(root):
     }
 
 
-def write_shims_node(root, shims):
+def _write_shims_yaml(root, shims):
     content = ""
     for shim in sorted(shims.values(), key=lambda shim: shim.reference):
         content += "{name}: {reference}\n".format(
             name=shim.name, reference=shim.reference
         )
-    open(shims_node(root), "w").write(content)
+    path = shims_node(root)
+    temporary_path = "{path}.{pid}".format(path=path, pid=os.getpid())
+    with open(temporary_path, "w") as handle:
+        handle.write(content)
+    # The rename keeps the stat, so the index matches exactly this content.
+    stat = os.stat(temporary_path)
+    os.replace(temporary_path, path)
+    write_shims_index(
+        root, _shim_index_entries(shims), (stat.st_mtime_ns, stat.st_size)
+    )
 
 
-def _bind_shims_with_lock(root, shims, multi_lock):
-    bin_root = bin_node(root)
+def _shim_index_entries(shims):
+    return [
+        (_package_key(shim.reference), shim.name, str(shim.reference))
+        for shim in shims.values()
+    ]
+
+
+def _read_shims_database(root):
+    with ShimDatabase(shims_database_node(root), read_only=True) as database:
+        entries = database.read()
+    return {
+        name: Shim(name, Reference.make(reference, root, root))
+        for name, reference in entries.items()
+    }
+
+
+def _write_shims_database(root, shims):
+    with ShimDatabase(shims_database_node(root)) as database:
+        database.write({
+            shim.name: (str(shim.reference), _package_key(shim.reference))
+            for shim in shims.values()
+        })
+
+
+def read_shims_node(root):
+    if shims_database_enabled(root):
+        return _read_shims_database(root)
+    return _read_shims_yaml(root)
+
+
+def read_installed_shims(root):
+    # For callers that only need the shims: the database is consistent on its
+    # own, shims.yaml is only consistent under the workspace lock.
+    if shims_database_enabled(root):
+        return _read_shims_database(root)
+    with WorkspaceReadLock(lock_node(root)):
+        return _read_shims_yaml(root)
+
+
+def write_shims_node(root, shims):
+    if shims_database_enabled(root):
+        _write_shims_database(root, shims)
+    else:
+        _write_shims_yaml(root, shims)
+
+
+def _entries_with_prefix(entries, prefix):
+    # entries are sorted, so each package prefix is one contiguous range.
+    for entry in entries[bisect.bisect_left(entries, (prefix, )):]:
+        if not entry[0].startswith(prefix):
+            break
+        yield entry
 
-    if multi_lock:
-        _delete_all_multishim_files(bin_root)
-    _delete_all_shim_files(bin_root)
 
+def _find_shim_index_ranges(root, prefixes):
+    if shims_database_enabled(root):
+        with ShimDatabase(
+            shims_database_node(root), read_only=True
+        ) as database:
+            return [
+                database.find_by_package_prefix(prefix)
+                for prefix in prefixes
+            ]
+    ranges = []
+    for prefix in prefixes:
+        entries = read_shims_index(root, prefix)
+        if entries is None:
+            break
+        ranges.append(entries)
+    else:
+        return ranges
+    # shims.yaml was edited by hand or predates the index. This runs without
+    # the workspace lock, so the index is not rebuilt here; the next locked
+    # write of shims.yaml rebuilds it. It is read once for all prefixes.
+    entries = sorted(_shim_index_entries(_read_shims_yaml(root)))
+    return [list(_entries_with_prefix(entries, prefix)) for prefix in prefixes]
+
+
+def _matches_reference(reference, base, package_path, shim_reference):
+    if reference.wildcard == Reference.Wildcard.RECURSIVE_WILDCARD:
+        # Packages below the reference, but not in workspaces mounted there.
+        if package_path == base:
+            return True
+        if reference.package_path:
+            child_prefix = base + REFERENCE_PATH_SEPARATOR_TOKEN
+        else:
+            child_prefix = base
+        return (
+            package_path.startswith(child_prefix)
+            and ROOT_ANCHOR_TOKEN not in package_path[len(child_prefix):]
+        )
+    if package_path != base:
+        return False
+    return bool(reference.wildcard) or shim_reference == str(reference)
+
+
+def find_installed_shims(root, references):
+    # Answered from the shims database or the reverse index alone: no package
+    # node is read, so shims of deleted packages are found as well. Returns
+    # the shims of each reference, in order.
+    for reference in references:
+        if not reference.wildcard and not reference.target_name:
+            raise ValueError(
+                "Reference {reference} does not contain a target".format(
+                    reference=reference
+                )
+            )
+    bases = [_package_key(reference) for reference in references]
+    return [
+        {
+            name: shim_reference
+            for package_path, name, shim_reference in entries
+            if _matches_reference(
+                reference, base, package_path, shim_reference
+            )
+        }
+        for reference, base, entries in
+        zip(references, bases, _find_shim_index_ranges(root, bases))
+    ]
+
+
+def import_shims_database(root):
+    shims = _read_shims_yaml(root)
+    _write_shims_database(root, shims)
+    return shims
+
+
+def export_shims_database(root, disable=False):
+    shims = _read_shims_database(root)
+    _write_shims_yaml(root, shims)
+    if disable:
+        for suffix in ("", "-wal", "-shm"):
+            path = shims_database_node(root) + suffix
+            if os.path.exists(path):
+                os.unlink(path)
+    return shims
+
+
+def read_bind_mode(root):
+    try:
+        with open(bind_mode_node(root), "r") as handle:
+            mode = handle.read().strip()
+    except FileNotFoundError:
+        return BIND_MODE_SCRIPTS
+    if mode not in BIND_MODES:
+        raise ValueError("Bind mode '{mode}' is invalid".format(mode=mode))
+    return mode
+
+
+def write_bind_mode(root, mode):
+    if mode not in BIND_MODES:
+        raise ValueError("Bind mode '{mode}' is invalid".format(mode=mode))
+    with open(bind_mode_node(root), "w") as handle:
+        handle.write(mode + "\n")
+
+
+def write_executable(path, content):
+    with open(path, "w") as handle:
+        handle.write(content)
+    os.chmod(
+        path,
+        stat.S_IRWXU | stat.S_IRWXG | stat.S_IROTH | stat.S_IXOTH,
+    )
+
+
+def _bind_shim_scripts(root, bin_root, shims):
     for shim in shims.values():
-        shim_file = os.path.join(bin_root, shim.name)
-        with open(shim_file, "w") as handle:
-            handle.write(
-                SHIM_TEMPLATE.format(root=root, reference=shim.reference)
+        write_executable(
+            os.path.join(bin_root, shim.name),
+            SHIM_TEMPLATE.format(root=root, reference=shim.reference),
+        )
+
+
+def check_dispatcher_shim_names(shims):
+    if SASHIMMI_DISPATCHER_NODE in shims:
+        raise ValueError(
+            "Shim name '{name}' is reserved for the dispatcher".format(
+                name=SASHIMMI_DISPATCHER_NODE
             )
-        os.chmod(
-            shim_file,
-            stat.S_IRWXU | stat.S_IRWXG | stat.S_IROTH | stat.S_IXOTH,
         )
 
-        if multi_lock:
+
+def _bind_shim_dispatcher(root, bin_root, shims):
+    check_dispatcher_shim_names(shims)
+    write_executable(
+        dispatcher_node(root), DISPATCHER_TEMPLATE.format(root=root)
+    )
+    for shim in shims.values():
+        os.symlink(
+            SASHIMMI_DISPATCHER_NODE, os.path.join(bin_root, shim.name)
+        )
+
+
+def _bind_shim_launcher(root, bin_root, shims):
+    archive = write_launcher_archive(root)
+    for shim in shims.values():
+        write_executable(
+            os.path.join(bin_root, shim.name),
+            make_launcher_script(root, archive, shim.reference),
+        )
+
+
+BIND_MODES = {
+    BIND_MODE_SCRIPTS: _bind_shim_scripts,
+    BIND_MODE_DISPATCHER: _bind_shim_dispatcher,
+    BIND_MODE_LAUNCHER: _bind_shim_launcher,
+}
+
+
+def _bind_shims_with_lock(root, shims, bound_names):
+    bin_root = bin_node(root)
+
+    if bound_names is not None:
+        delete_multishim_files(root, bound_names)
+    _delete_all_shim_files(bin_root)
+
+    BIND_MODES[read_bind_mode(root)](root, bin_root, shims)
+
+    if bound_names is not None:
+        for shim in shims.values():
+            shim_file = os.path.join(bin_root, shim.name)
             multi_shim_root = multi_shim_node(shim.name)
-            multi_shim_file = os.path.join(multi_shim_root, _sha256(root))
+            multi_shim_file = os.path.join(multi_shim_root, sha256(root))
             multi_bin_file = os.path.join(multi_bin_node(), shim.name)
 
             pathlib.Path(multi_shim_root).mkdir(exist_ok=True)
@@ -112,9 +365,14 @@ def _bind_shims_with_lock(root, shims, multi_lock):
             os.symlink(multi_shim_file, multi_bin_file)
 
 
-def bind_shims(root, shims, multi_lock):
-    if multi_lock:
-        with multi_lock as lock:
-            _bind_shims_with_lock(root, shims, multi_lock)
+def bind_shims(root, shims, make_multi_lock):
+    if make_multi_lock:
+        # Only the names this workspace binds or unbinds are locked, so
+        # workspaces with disjoint shim names bind in parallel. The caller
+        # holds the workspace lock, which keeps the set of names bound by
+        # this workspace stable between the scan and the locked update.
+        bound_names = bound_multishim_names(root)
+        with make_multi_lock(bound_names | set(shims)):
+            _bind_shims_with_lock(root, shims, bound_names)
     else:
-        _bind_shims_with_lock(root, shims, multi_lock)
+        _bind_shims_with_lock(root, shims, None)
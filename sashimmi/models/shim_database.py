@@ -0,0 +1,146 @@
+import sqlite3
+import urllib.parse
+
+from ..constants import ROOT_ANCHOR_TOKEN, REFERENCE_PART_SEPARATOR_TOKEN
+
+_SCHEMA = """\
+CREATE TABLE IF NOT EXISTS shims (
+    name TEXT PRIMARY KEY NOT NULL,
+    reference TEXT NOT NULL,
+    package_path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS shims_package_path ON shims (package_path);
+DROP INDEX IF EXISTS shims_reference;
+"""
+
+# Version 1 qualifies package paths of shims in mounted workspaces with the
+# mount path, matching the reverse index kept next to shims.yaml.
+_SCHEMA_VERSION = 1
+
+# Largest code point; every string starting with a prefix sorts below the
+# prefix followed by it.
+_PREFIX_END = "\U0010ffff"
+
+
+def _package_path(reference):
+    # Canonical target references are "//[MOUNT//]PACKAGE:TARGET".
+    return reference[len(ROOT_ANCHOR_TOKEN):].rpartition(
+        REFERENCE_PART_SEPARATOR_TOKEN
+    )[0]
+
+
+class ShimDatabase:
+    def __init__(self, path, read_only=False):
+        self.path = path
+        self.read_only = read_only
+        self.connection = None
+
+    def __enter__(self):
+        # Readers skip the schema setup, which takes a write lock, as long as
+        # a writer has already brought the database up to date.
+        if self.read_only and self.__connect_read_only():
+            return self
+        self.connection = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(_SCHEMA)
+        self.__migrate()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.connection.close()
+        self.connection = None
+
+    def __connect_read_only(self):
+        try:
+            self.connection = sqlite3.connect(
+                "file:{path}?mode=ro".format(
+                    path=urllib.parse.quote(self.path)
+                ),
+                timeout=30,
+                isolation_level=None,
+                uri=True,
+            )
+            version, = self.connection.execute(
+                "PRAGMA user_version"
+            ).fetchone()
+        except sqlite3.Error:
+            if self.connection:
+                self.connection.close()
+            self.connection = None
+            return False
+        if version < _SCHEMA_VERSION:
+            self.connection.close()
+            self.connection = None
+            return False
+        return True
+
+    def __migrate(self):
+        version, = self.connection.execute("PRAGMA user_version").fetchone()
+        if version >= _SCHEMA_VERSION:
+            return
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.executemany(
+                "UPDATE shims SET package_path = ? WHERE name = ?",
+                [
+                    (_package_path(reference), name)
+                    for name, reference in cursor.execute(
+                        "SELECT name, reference FROM shims"
+                    ).fetchall()
+                ],
+            )
+            cursor.execute(
+                "PRAGMA user_version = {version}".format(
+                    version=_SCHEMA_VERSION
+                )
+            )
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
+
+    def read(self):
+        return {
+            name: reference
+            for name, reference in self.connection.
+            execute("SELECT name, reference FROM shims ORDER BY name")
+        }
+
+    def find_by_package_prefix(self, prefix):
+        return [
+            (package_path, name, reference)
+            for package_path, name, reference in self.connection.execute(
+                "SELECT package_path, name, reference FROM shims WHERE package_path >= ? AND package_path < ? ORDER BY package_path, name",
+                (prefix, prefix + _PREFIX_END),
+            )
+        ]
+
+    def write(self, entries):
+        cursor = self.connection.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            existing = {
+                name: reference
+                for name, reference in
+                cursor.execute("SELECT name, reference FROM shims")
+            }
+            cursor.executemany(
+                "DELETE FROM shims WHERE name = ?",
+                [(name, ) for name in existing if name not in entries],
+            )
+            cursor.executemany(
+                "INSERT OR REPLACE INTO shims (name, reference, package_path) VALUES (?, ?, ?)",
+                [
+                    (name, reference, package_path)
+                    for name, (reference, package_path) in entries.items()
+                    if existing.get(name) != reference
+                ],
+            )
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
@@ -0,0 +1,100 @@
+import mmap
+import os
+import struct
+
+from ..constants import shims_index_node, shims_node
+
+# Reverse index from target packages to the shims installed for them, built
+# whenever shims.yaml is written. Layout: header with the stat of the shims
+# node it was built from, fixed-size index entries sorted by key, then the key
+# and reference blobs the entries point into. Keys are a package path, a NUL
+# and the shim name, so every package forms one contiguous key range.
+_MAGIC = b"SASHSIX1"
+_HEADER = struct.Struct("<8sQQI")
+_ENTRY = struct.Struct("<QIQI")
+_SEPARATOR = b"\0"
+
+
+def _shims_node_stat(root):
+    stat = os.stat(shims_node(root))
+    return stat.st_mtime_ns, stat.st_size
+
+
+def write_shims_index(root, entries, shims_stat):
+    # shims_stat is the stat of the shims node holding exactly these entries,
+    # taken by the caller before any later write could change the node.
+    keyed = sorted(
+        (
+            package_path.encode("utf-8") + _SEPARATOR + name.encode("utf-8"),
+            reference.encode("utf-8"),
+        ) for package_path, name, reference in entries
+    )
+
+    offset = _HEADER.size + _ENTRY.size * len(keyed)
+    index = []
+    blobs = []
+    for key, reference in keyed:
+        index.append(
+            _ENTRY.pack(offset, len(key), offset + len(key), len(reference))
+        )
+        blobs.append(key)
+        blobs.append(reference)
+        offset += len(key) + len(reference)
+
+    mtime, size = shims_stat
+    path = shims_index_node(root)
+    temporary_path = "{path}.{pid}".format(path=path, pid=os.getpid())
+    with open(temporary_path, "wb") as handle:
+        handle.write(_HEADER.pack(_MAGIC, mtime, size, len(keyed)))
+        handle.write(b"".join(index))
+        handle.write(b"".join(blobs))
+    os.replace(temporary_path, path)
+
+
+def _read_range(data, count, prefix):
+    def entry(position):
+        return _ENTRY.unpack_from(data, _HEADER.size + position * _ENTRY.size)
+
+    def key(position):
+        key_offset, key_length, _, _ = entry(position)
+        return data[key_offset:key_offset + key_length]
+
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        if key(middle) < prefix:
+            low = middle + 1
+        else:
+            high = middle
+
+    for position in range(low, count):
+        key_offset, key_length, reference_offset, reference_length = entry(
+            position
+        )
+        candidate = data[key_offset:key_offset + key_length]
+        if not candidate.startswith(prefix):
+            break
+        package_path, _, name = candidate.partition(_SEPARATOR)
+        yield (
+            package_path.decode("utf-8"),
+            name.decode("utf-8"),
+            data[reference_offset:reference_offset +
+                 reference_length].decode("utf-8"),
+        )
+
+
+def read_shims_index(root, prefix):
+    # None means the index is missing or older than the shims node, in which
+    # case the caller has to read the shims node itself.
+    try:
+        with open(shims_index_node(root), "rb") as handle:
+            data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, mtime, size, count = _HEADER.unpack_from(data, 0)
+            if magic != _MAGIC or (mtime, size) != _shims_node_stat(root):
+                return None
+            return list(_read_range(data, count, prefix.encode("utf-8")))
+        finally:
+            data.close()
+    except (OSError, ValueError, struct.error):
+        return None
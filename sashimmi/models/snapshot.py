@@ -0,0 +1,156 @@
+import hashlib
+import os
+import pathlib
+import pickle
+
+from ..constants import (
+    SASHIMMI_SNAPSHOT_VARIABLE,
+    image_digests_node,
+    snapshots_node,
+)
+
+# Bump whenever the pickled model classes change shape.
+_SNAPSHOT_VERSION = 4
+_SNAPSHOT_SUFFIX = ".pickle"
+_RETAINED_SNAPSHOTS = 4
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None, None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _node_stats(workspace):
+    stats = {}
+    for package in workspace.packages.values():
+        stat = os.stat(package.absolute_node)
+        stats[package.node] = (stat.st_mtime_ns, stat.st_size)
+    digests_node = os.path.relpath(
+        image_digests_node(workspace.root), start=workspace.root
+    )
+    stats[digests_node] = _stat(image_digests_node(workspace.root))
+    # Added packages only show up in the input of package discovery.
+    for path, stat in workspace.discovery_inputs.items():
+        stats[path] = tuple(stat)
+    return stats
+
+
+def _generation(root, stats):
+    sha256 = hashlib.sha256()
+    sha256.update(root.encode("utf-8"))
+    for node in sorted(stats.keys()):
+        mtime, size = stats[node]
+        sha256.update(
+            "\0{node}\0{mtime}\0{size}".format(
+                node=node, mtime=mtime, size=size
+            ).encode("utf-8")
+        )
+    return sha256.hexdigest()
+
+
+def _list_snapshots(node):
+    snapshots = []
+    try:
+        entries = os.listdir(node)
+    except FileNotFoundError:
+        return snapshots
+    for entry in entries:
+        if not entry.endswith(_SNAPSHOT_SUFFIX):
+            continue
+        path = os.path.join(node, entry)
+        try:
+            snapshots.append((os.stat(path).st_mtime, path))
+        except FileNotFoundError:
+            continue
+    return sorted(snapshots)
+
+
+def _prune_snapshots(node, keep):
+    for _mtime, path in _list_snapshots(node)[:-_RETAINED_SNAPSHOTS]:
+        if path != keep:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+def write_workspace_snapshot(workspace):
+    stats = _node_stats(workspace)
+    node = snapshots_node(workspace.root)
+    path = os.path.join(
+        node, _generation(workspace.root, stats) + _SNAPSHOT_SUFFIX
+    )
+    if os.path.exists(path):
+        return path
+
+    pathlib.Path(node).mkdir(exist_ok=True)
+    temporary_path = "{path}.{pid}".format(path=path, pid=os.getpid())
+    with open(temporary_path, "wb") as handle:
+        pickle.dump(
+            {
+                "version": _SNAPSHOT_VERSION,
+                "root": workspace.root,
+                "nodes": stats,
+                "workspace": workspace,
+            },
+            handle,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    os.replace(temporary_path, path)
+    _prune_snapshots(node, path)
+    return path
+
+
+def _snapshot_is_current(root, snapshot):
+    if snapshot.get("version") != _SNAPSHOT_VERSION:
+        return False
+    if snapshot.get("root") != root:
+        return False
+    for node, stat in snapshot["nodes"].items():
+        if _stat(os.path.join(root, node)) != tuple(stat):
+            return False
+    return True
+
+
+def _is_in_snapshots_node(root, path):
+    # Resolved so neither symlinks nor ".." components lead outside it.
+    node = os.path.realpath(snapshots_node(root))
+    path = os.path.realpath(path)
+    try:
+        return path != node and os.path.commonpath([node, path]) == node
+    except ValueError:
+        return False
+
+
+def load_workspace_snapshot(root):
+    path = os.environ.get(SASHIMMI_SNAPSHOT_VARIABLE)
+    if not path or not _is_in_snapshots_node(root, path):
+        return None
+    try:
+        with open(path, "rb") as handle:
+            # Unpickling runs code, so only load snapshots this user wrote.
+            if os.fstat(handle.fileno()).st_uid != os.getuid():
+                return None
+            snapshot = pickle.load(handle)
+    except Exception:
+        return None
+    if not _snapshot_is_current(root, snapshot):
+        return None
+    return snapshot["workspace"]
+
+
+def export_workspace_snapshot(workspace):
+    try:
+        path = write_workspace_snapshot(workspace)
+    except (OSError, pickle.PicklingError):
+        return
+    os.environ[SASHIMMI_SNAPSHOT_VARIABLE] = path
+
+
+def export_latest_workspace_snapshot(root):
+    snapshots = _list_snapshots(snapshots_node(root))
+    if snapshots:
+        os.environ[SASHIMMI_SNAPSHOT_VARIABLE] = snapshots[-1][1]
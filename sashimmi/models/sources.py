@@ -0,0 +1,44 @@
+import hashlib
+import os
+
+_source_hash = None
+
+
+def package_directory():
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _source_paths(directory):
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames[:] = sorted(
+            name for name in dirnames if name != "__pycache__"
+        )
+        for filename in sorted(filenames):
+            if filename.endswith(".py"):
+                yield os.path.join(dirpath, filename)
+
+
+def source_hash():
+    # Identifies the sashimmi code this process runs, so caches of its
+    # objects are not read back by a different version. Computed once.
+    global _source_hash
+    if _source_hash is None:
+        directory = package_directory()
+        if os.path.isdir(directory):
+            sha256 = hashlib.sha256()
+            for path in _source_paths(directory):
+                name = os.path.relpath(path, start=directory)
+                sha256.update(name.encode("utf-8"))
+                sha256.update(b"\0")
+                with open(path, "rb") as handle:
+                    sha256.update(handle.read())
+                sha256.update(b"\0")
+            _source_hash = sha256.hexdigest()
+        else:
+            # Running from the launcher archive, which holds no sources but
+            # records the hash of those it was built from.
+            from .launcher import read_launcher_metadata
+            _source_hash = read_launcher_metadata(
+                os.path.dirname(directory)
+            )["source_hash"]
+    return _source_hash
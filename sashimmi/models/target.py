@@ -1,7 +1,10 @@
 from ..actions import get_action_class
 from ..actions.arguments import ArgumentsAction
+from ..actions.docker import DockerAction
+from ..adapters.adapter import Adapter
 from ..adapters.exec import ExecAdapter
 from .reference import Reference
+from .scheduling import Scheduling
 
 
 def _make_actions_from_yaml_node(yaml_node, target_reference):
@@ -21,13 +24,32 @@ def _make_actions_from_yaml_node(yaml_node, target_reference):
     return actions
 
 
-def _make_adapters(actions):
+def _make_adapter_mode(yaml_node, target_reference):
+    mode = yaml_node.get("adapter", Adapter.Mode.AUTO.value)
+    try:
+        return Adapter.Mode(mode)
+    except ValueError:
+        raise ValueError(
+            "Target {target} has unknown adapter mode '{mode}'".format(
+                target=target_reference, mode=mode
+            )
+        )
+
+
+def _walk_actions(actions):
+    for action in actions:
+        yield action
+        yield from _walk_actions(action.nested_actions())
+
+
+def _make_adapters(actions, adapter_mode):
     adapters = [ExecAdapter()]
     for action in actions:
         active_adapter = adapters[-1]
-        active_adapter.adapt(action)
         next_adapter = action.adapter()
+        active_adapter.adapt(action, next_adapter)
         if next_adapter:
+            next_adapter.mode = adapter_mode
             adapters.append(next_adapter)
     return adapters
 
@@ -44,6 +66,7 @@ class Target:
         target_reference = Reference(
             package_reference.package_path,
             target_name,
+            mount_path=package_reference.mount_path,
         )
 
         if "actions" not in yaml_node:
@@ -59,13 +82,36 @@ class Target:
             yaml_node["actions"],
             target_reference,
         )
+        scheduling = Scheduling.make_from_yaml_node(
+            yaml_node.get("scheduling"), target_reference
+        )
+        # Containers do not inherit the client's scheduling, so docker
+        # actions pass the hints on as docker run flags.
+        for action in _walk_actions(actions):
+            if isinstance(action, DockerAction):
+                action.scheduling = scheduling
+
+        return Target(
+            None,
+            target_reference,
+            actions,
+            adapter_mode=_make_adapter_mode(yaml_node, target_reference),
+            scheduling=scheduling,
+        )
 
-        return Target(None, target_reference, actions)
-
-    def __init__(self, package, reference, actions):
+    def __init__(
+        self,
+        package,
+        reference,
+        actions,
+        adapter_mode=Adapter.Mode.AUTO,
+        scheduling=None,
+    ):
         self.package = package
         self.reference = reference
         self.actions = actions
+        self.adapter_mode = adapter_mode
+        self.scheduling = scheduling if scheduling else Scheduling()
 
     def __str__(self):
         return "Target({name})".format(name=self.name)
@@ -78,11 +124,21 @@ class Target:
     def workspace(self):
         return self.package.workspace
 
+    def find_actions(self, action_class):
+        return [
+            action for action in _walk_actions(self.actions)
+            if isinstance(action, action_class)
+        ]
+
     def adapt(self, arguments=[], apply_substitutions=False):
-        adapters = list(
-            _make_adapters(self.actions + [ArgumentsAction(arguments)])
+        return self.adapt_actions(
+            self.actions + [ArgumentsAction(arguments)],
+            apply_substitutions=apply_substitutions,
         )
 
+    def adapt_actions(self, actions, apply_substitutions=False):
+        adapters = list(_make_adapters(actions, self.adapter_mode))
+
         arguments = []
         for adapter in adapters:
             arguments += adapter.command_line_arguments(
@@ -0,0 +1,211 @@
+import json
+import math
+import os
+import time
+
+from ..constants import (
+    SASHIMMI_RECORD_USAGE,
+    usage_log_node,
+    usage_summary_node,
+)
+
+# Each run appends one short line with a single O_APPEND write, so concurrent
+# shims never need a lock to record their usage. The raw log only grows until
+# the next compaction folds it into per-reference histograms.
+_USAGE_LOG_FIELDS = 5
+
+_USAGE_SUMMARY_VERSION = 1
+# Histogram buckets grow by a quarter from one microsecond, so a percentile
+# read from a bucket is at most 25% above the recorded duration.
+_BUCKET_BASE = 0.000001
+_BUCKET_GROWTH = 1.25
+
+
+class UsageRecord:
+    def __init__(self, timestamp, reference, resolution, lock_wait, source):
+        self.timestamp = timestamp
+        self.reference = reference
+        self.resolution = resolution
+        self.lock_wait = lock_wait
+        self.source = source
+
+
+def record_usage(root, reference, resolution, lock_wait, source):
+    if not SASHIMMI_RECORD_USAGE:
+        return
+    line = "{timestamp:.3f}\t{reference}\t{resolution:.6f}\t{lock_wait:.6f}\t{source}\n".format(
+        timestamp=time.time(),
+        reference=reference,
+        resolution=resolution,
+        lock_wait=lock_wait,
+        source=source,
+    ).encode("utf-8")
+    try:
+        fd = os.open(
+            usage_log_node(root), os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+            0o664
+        )
+    except OSError:
+        return
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+def _read_records(path):
+    try:
+        handle = open(path, "r")
+    except FileNotFoundError:
+        return
+    with handle:
+        for line in handle:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) != _USAGE_LOG_FIELDS:
+                continue
+            try:
+                yield UsageRecord(
+                    float(fields[0]),
+                    fields[1],
+                    float(fields[2]),
+                    float(fields[3]),
+                    fields[4],
+                )
+            except ValueError:
+                continue
+
+
+def read_usage(root):
+    return _read_records(usage_log_node(root))
+
+
+class UsageSummary:
+    def __init__(self, calls=0, table=0, resolution=None, lock_wait=None):
+        self.calls = calls
+        self.table = table
+        self.resolution = resolution if resolution else {}
+        self.lock_wait = lock_wait if lock_wait else {}
+
+    def add(self, record):
+        self.calls += 1
+        if record.source == "table":
+            self.table += 1
+        _add_to_histogram(self.resolution, record.resolution)
+        _add_to_histogram(self.lock_wait, record.lock_wait)
+
+    def document(self):
+        return {
+            "calls": self.calls,
+            "table": self.table,
+            "resolution": {
+                str(bucket): count
+                for bucket, count in self.resolution.items()
+            },
+            "lock_wait": {
+                str(bucket): count
+                for bucket, count in self.lock_wait.items()
+            },
+        }
+
+    @staticmethod
+    def make_from_document(document):
+        return UsageSummary(
+            calls=document["calls"],
+            table=document["table"],
+            resolution={
+                int(bucket): count
+                for bucket, count in document["resolution"].items()
+            },
+            lock_wait={
+                int(bucket): count
+                for bucket, count in document["lock_wait"].items()
+            },
+        )
+
+
+def _bucket(value):
+    if value <= _BUCKET_BASE:
+        return 0
+    return math.ceil(math.log(value / _BUCKET_BASE, _BUCKET_GROWTH))
+
+
+def _add_to_histogram(histogram, value):
+    bucket = _bucket(value)
+    histogram[bucket] = histogram.get(bucket, 0) + 1
+
+
+def histogram_percentile(histogram, fraction):
+    total = sum(histogram.values())
+    if not total:
+        return 0.0
+    rank = max(1, math.ceil(fraction * total))
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= rank:
+            return _BUCKET_BASE * _BUCKET_GROWTH**bucket
+    return _BUCKET_BASE * _BUCKET_GROWTH**max(histogram)
+
+
+def _read_usage_summaries(root):
+    try:
+        with open(usage_summary_node(root), "r") as handle:
+            document = json.load(handle)
+    except FileNotFoundError:
+        return {}
+    if document.get("version") != _USAGE_SUMMARY_VERSION:
+        return {}
+    return {
+        reference: UsageSummary.make_from_document(summary)
+        for reference, summary in document["references"].items()
+    }
+
+
+def _write_usage_summaries(root, summaries):
+    path = usage_summary_node(root)
+    temporary_path = "{path}.{pid}".format(path=path, pid=os.getpid())
+    with open(temporary_path, "w") as handle:
+        json.dump(
+            {
+                "version": _USAGE_SUMMARY_VERSION,
+                "references": {
+                    reference: summary.document()
+                    for reference, summary in summaries.items()
+                },
+            },
+            handle,
+        )
+    os.replace(temporary_path, path)
+
+
+def compact_usage(root):
+    # The caller holds the workspace write lock. The raw log is renamed first,
+    # so runs recording concurrently start a new log instead of appending to
+    # lines that are being folded in.
+    summaries = _read_usage_summaries(root)
+    path = usage_log_node(root)
+    compacting_path = "{path}.{pid}".format(path=path, pid=os.getpid())
+    try:
+        os.rename(path, compacting_path)
+    except FileNotFoundError:
+        return summaries
+    for record in _read_records(compacting_path):
+        summaries.setdefault(record.reference, UsageSummary()).add(record)
+    _write_usage_summaries(root, summaries)
+    os.unlink(compacting_path)
+    return summaries
+
+
+def clear_usage(root):
+    for path in (usage_log_node(root), usage_summary_node(root)):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
@@ -0,0 +1,290 @@
+import hashlib
+import os
+import pathlib
+import stat
+
+from ..constants import (
+    SASHIMMI_DISPATCHER_NODE,
+    bin_node,
+    launcher_node,
+    multi_bin_node,
+    multi_shim_node,
+)
+from .launcher import (
+    find_launcher_archive_drift,
+    make_launcher_script,
+    write_launcher_archive,
+)
+from .package import Package
+from .parse_cache import ParseCache
+from .reference import resolve_mount
+from .reference_table import lookup_reference_table
+from .shim import (
+    BIND_MODE_DISPATCHER,
+    BIND_MODE_LAUNCHER,
+    DISPATCHER_TEMPLATE,
+    SHIM_TEMPLATE,
+    bound_multishim_names,
+    check_dispatcher_shim_names,
+    delete_file_or_dir,
+    delete_multishim_files,
+    replace_link,
+    sha256,
+    write_executable,
+)
+
+_KIND_FILE = "file"
+_KIND_LINK = "link"
+
+
+class Drift:
+    def __init__(self, path, message, repair=None):
+        self.path = path
+        self.message = message
+        self.repair = repair
+
+    def __str__(self):
+        return "{path}: {message}".format(path=self.path, message=self.message)
+
+
+def _expected_bin_entries(root, shims, mode):
+    if mode == BIND_MODE_DISPATCHER:
+        check_dispatcher_shim_names(shims)
+        entries = {
+            SASHIMMI_DISPATCHER_NODE:
+            (_KIND_FILE, DISPATCHER_TEMPLATE.format(root=root))
+        }
+        for shim in shims.values():
+            entries[shim.name] = (_KIND_LINK, SASHIMMI_DISPATCHER_NODE)
+        return entries
+    if mode == BIND_MODE_LAUNCHER:
+        return {
+            shim.name: (
+                _KIND_FILE,
+                make_launcher_script(
+                    root, launcher_node(root), shim.reference
+                ),
+            )
+            for shim in shims.values()
+        }
+    return {
+        shim.name: (
+            _KIND_FILE,
+            SHIM_TEMPLATE.format(root=root, reference=shim.reference),
+        )
+        for shim in shims.values()
+    }
+
+
+def _file_drift(path, content):
+    # Size and mode come from the stat already taken; the content is only
+    # read and hashed when they match.
+    try:
+        status = os.lstat(path)
+    except FileNotFoundError:
+        return "missing"
+    if not stat.S_ISREG(status.st_mode):
+        return "not a regular file"
+    expected = content.encode("utf-8")
+    if status.st_size != len(expected):
+        return "content differs from the bind mode template"
+    with open(path, "rb") as handle:
+        actual = hashlib.sha256(handle.read()).hexdigest()
+    if actual != hashlib.sha256(expected).hexdigest():
+        return "content differs from the bind mode template"
+    if not status.st_mode & stat.S_IXUSR:
+        return "not executable"
+    return None
+
+
+def _link_drift(path, target):
+    try:
+        actual = os.readlink(path)
+    except FileNotFoundError:
+        return "missing"
+    except OSError:
+        return "not a symlink"
+    if actual != target:
+        return "points to {actual} instead of {target}".format(
+            actual=actual, target=target
+        )
+    return None
+
+
+def _replace_file(path, content):
+    def repair():
+        if os.path.lexists(path):
+            delete_file_or_dir(path)
+        write_executable(path, content)
+
+    return repair
+
+
+def _relink(path, target):
+    return lambda: replace_link(path, target)
+
+
+def _replace_multi_shim_link(multi_shim_root, path, target):
+    def repair():
+        pathlib.Path(multi_shim_root).mkdir(exist_ok=True)
+        replace_link(path, target)
+
+    return repair
+
+
+def _remove_multi_shim(root, name):
+    return lambda: delete_multishim_files(root, [name])
+
+
+def _remove(path):
+    return lambda: delete_file_or_dir(path)
+
+
+def find_bin_drift(root, shims, mode):
+    bin_root = bin_node(root)
+    entries = _expected_bin_entries(root, shims, mode)
+    drift = []
+    if mode == BIND_MODE_LAUNCHER:
+        message = find_launcher_archive_drift(root)
+        if message:
+            drift.append(
+                Drift(
+                    launcher_node(root),
+                    message,
+                    lambda: write_launcher_archive(root),
+                )
+            )
+    for name, (kind, value) in sorted(entries.items()):
+        path = os.path.join(bin_root, name)
+        if kind == _KIND_FILE:
+            message = _file_drift(path, value)
+            repair = _replace_file(path, value)
+        else:
+            message = _link_drift(path, value)
+            repair = _relink(path, value)
+        if message:
+            drift.append(Drift(path, message, repair))
+    for name in sorted(os.listdir(bin_root)):
+        if name not in entries:
+            path = os.path.join(bin_root, name)
+            drift.append(Drift(path, "not an installed shim", _remove(path)))
+    return drift
+
+
+def _multi_bin_drift(path, multi_shim_root):
+    # Another workspace may own the name; any live link into the shim's
+    # multi directory is a valid binding.
+    try:
+        target = os.readlink(path)
+    except FileNotFoundError:
+        return "missing"
+    except OSError:
+        return "not a symlink"
+    if os.path.dirname(target) != multi_shim_root:
+        return "points outside of {root}".format(root=multi_shim_root)
+    if not os.path.exists(path):
+        return "dangling"
+    return None
+
+
+def find_multi_drift(root, shims):
+    entry = sha256(root)
+    drift = []
+    for name in sorted(shims):
+        shim_file = os.path.join(bin_node(root), name)
+        multi_shim_root = multi_shim_node(name)
+        multi_shim_file = os.path.join(multi_shim_root, entry)
+        multi_bin_file = os.path.join(multi_bin_node(), name)
+
+        message = _link_drift(multi_shim_file, shim_file)
+        if message:
+            drift.append(
+                Drift(
+                    multi_shim_file,
+                    message,
+                    _replace_multi_shim_link(
+                        multi_shim_root, multi_shim_file, shim_file
+                    ),
+                )
+            )
+
+        message = _multi_bin_drift(multi_bin_file, multi_shim_root)
+        if message:
+            drift.append(
+                Drift(
+                    multi_bin_file,
+                    message,
+                    _relink(multi_bin_file, multi_shim_file),
+                )
+            )
+
+    for name in sorted(bound_multishim_names(root) - set(shims)):
+        drift.append(
+            Drift(
+                os.path.join(multi_shim_node(name), entry),
+                "not an installed shim",
+                _remove_multi_shim(root, name),
+            )
+        )
+    return drift
+
+
+class _TargetChecker:
+    def __init__(self, root):
+        self.root = root
+        self.parse_cache = ParseCache()
+        self.packages = {}
+
+    def __package(self, root, reference):
+        key = (root, reference.package_part)
+        if key not in self.packages:
+            self.packages[key] = Package.make(
+                root, reference.package_part, parse_cache=self.parse_cache
+            )
+        return self.packages[key]
+
+    def check(self, reference):
+        try:
+            root, reference = resolve_mount(self.root, reference)
+        except KeyError:
+            return "workspace mount {mount} not found".format(
+                mount=reference.mount_path
+            )
+        if not os.path.isfile(os.path.join(root, reference.package_node_path)):
+            return "package {package} not found".format(
+                package=reference.package_part
+            )
+        # A current reference table record proves the target exists without
+        # parsing its package.
+        if lookup_reference_table(root, reference) is not None:
+            return None
+        try:
+            package = self.__package(root, reference)
+        except (KeyError, ValueError) as error:
+            return "package {package} is invalid: {error}".format(
+                package=reference.package_part, error=error
+            )
+        if reference not in package.targets:
+            return "target {target} not found".format(target=reference)
+        return None
+
+
+def find_dangling_shims(root, shims):
+    checker = _TargetChecker(root)
+    drift = []
+    for name, shim in sorted(shims.items()):
+        message = checker.check(shim.reference)
+        if message:
+            drift.append(
+                Drift(
+                    "{name} ({reference})".format(
+                        name=name, reference=shim.reference
+                    ),
+                    message,
+                )
+            )
+    return drift
+
+
+def multi_lock_names(root, shims):
+    return bound_multishim_names(root) | set(shims)
@@ -1,31 +1,61 @@
-import os
+import logging
 
-from ..constants import SASHIMMI_PACKAGE_NODE
+from ..constants import SASHIMMI_DISCOVERY, ROOT_ANCHOR_TOKEN
 
+from .discovery import find_package_directories
+from .image_digests import apply_image_digests
 from .package import Package
-from .reference import Reference
+from .parse_cache import ParseCache
+from .reference import Reference, mount_root
 
 
-def _find_packages(root):
-    for dirpath, _dirnames, filenames in os.walk(root):
-        for f in filenames:
-            if f == SASHIMMI_PACKAGE_NODE:
-                relative = os.path.relpath(dirpath, start=root)
-                yield Reference.make(relative, root, root)
+def _find_packages(root, discovery, mount_path, inputs):
+    for directory in find_package_directories(
+        root, discovery=discovery, inputs=inputs
+    ):
+        yield Reference.make(directory, root, root).remount(mount_path)
 
 
 class Workspace:
     @staticmethod
-    def make(root):
+    def make(root, discovery=SASHIMMI_DISCOVERY, mount_path=""):
+        parse_cache = ParseCache()
+        discovery_inputs = {}
         packages = {
-            reference: Package.make(root, reference)
-            for reference in _find_packages(root)
+            reference: Package.make(root, reference, parse_cache=parse_cache)
+            for reference in _find_packages(
+                root, discovery, mount_path, discovery_inputs
+            )
         }
-        return Workspace(root, packages)
+        logging.debug(
+            "Parse cache: %d hits, %d misses", parse_cache.hits,
+            parse_cache.misses
+        )
+        if parse_cache.stores:
+            parse_cache.evict()
+        apply_image_digests(root, packages)
+        return Workspace(
+            root,
+            packages,
+            discovery=discovery,
+            mount_path=mount_path,
+            discovery_inputs=discovery_inputs,
+        )
 
-    def __init__(self, root, packages):
+    def __init__(
+        self,
+        root,
+        packages,
+        discovery=SASHIMMI_DISCOVERY,
+        mount_path="",
+        discovery_inputs=None,
+    ):
         self.root = root
         self.packages = packages
+        self.discovery = discovery
+        self.mount_path = mount_path
+        self.discovery_inputs = discovery_inputs if discovery_inputs else {}
+        self.mounts = {}
         for package in self.packages.values():
             package.workspace = self
 
@@ -36,6 +66,33 @@ class Workspace:
     def node(self):
         return constants.root_node(self.root)
 
+    def mount(self, mount_path):
+        name, _, rest = mount_path.partition(ROOT_ANCHOR_TOKEN)
+        if name not in self.mounts:
+            qualified_path = ROOT_ANCHOR_TOKEN.join(
+                path for path in (self.mount_path, name) if path
+            )
+            self.mounts[name] = Workspace.make(
+                mount_root(self.root, name),
+                discovery=self.discovery,
+                mount_path=qualified_path,
+            )
+        if rest:
+            return self.mounts[name].mount(rest)
+        return self.mounts[name]
+
+    def __find_mounted_workspace(self, reference):
+        if reference.mount_path == self.mount_path:
+            return self
+        prefix = self.mount_path + ROOT_ANCHOR_TOKEN if self.mount_path else ""
+        if not reference.mount_path.startswith(prefix):
+            raise KeyError(
+                "Reference {reference} is outside of workspace {root}".format(
+                    reference=reference, root=self.root
+                )
+            )
+        return self.mount(reference.mount_path[len(prefix):])
+
     def __find_package(self, reference):
         package_reference = reference.package_part
         if package_reference not in self.packages:
@@ -50,6 +107,10 @@ class Workspace:
         yield self.packages[package_reference]
 
     def find_packages(self, reference):
+        workspace = self.__find_mounted_workspace(reference)
+        if workspace is not self:
+            yield from workspace.find_packages(reference)
+            return
         yield from self.__find_package(reference)
         if reference.wildcard == Reference.Wildcard.RECURSIVE_WILDCARD:
             for child_package in self.packages.values():
@@ -1,12 +1,23 @@
+from .benchmark import BenchmarkSubcommand
 from .bind import BindSubcommand
+from .cache import CacheSubcommand
 from .clean import CleanSubcommand
+from .complete import CompleteSubcommand
+from .dispatch import DispatchSubcommand
+from .export import ExportSubcommand
 from .init import InitSubcommand
 from .install import InstallSubcommand
+from .multi_bind import MultiBindSubcommand
 from .package import PackageSubcommand
+from .prefetch import PrefetchSubcommand
 from .run import RunSubcommand
+from .shell_init import ShellInitSubcommand
 from .shims import ShimsSubcommand
+from .state import StateSubcommand
+from .stats import StatsSubcommand
 from .target import TargetSubcommand
 from .uninstall import UninstallSubcommand
+from .verify import VerifySubcommand
 from .workspace import WorkspaceSubcommand
 
 from .subcommand import get_subcommand, get_subcommands
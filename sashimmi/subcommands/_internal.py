@@ -1,18 +1,27 @@
 import os
 import pathlib
+import sys
 
 from ..constants import (
+    SASHIMMI_BUNDLE,
     root_node,
     bin_node,
     shims_node,
+    lock_node,
     multi_root_node,
     multi_bin_node,
     multi_shims_node,
+    multi_locks_node,
 )
 
 
-def _ensure_file(path):
-    pathlib.Path(path).touch()
+_ENTRIES_CHUNK_SIZE = 64 * 1024
+
+
+def ensure_file(path):
+    # Leave existing files untouched; their mtimes invalidate cached state.
+    if not os.path.exists(path):
+        pathlib.Path(path).touch()
 
 
 def _ensure_directory(path):
@@ -45,7 +54,11 @@ def ensure_bin_node(root):
 
 
 def ensure_shims_node(root):
-    _ensure_file(shims_node(root))
+    ensure_file(shims_node(root))
+
+
+def ensure_lock_node(root):
+    ensure_file(lock_node(root))
 
 
 def ensure_multi_root_node():
@@ -60,9 +73,88 @@ def ensure_multi_shims_node():
     _ensure_directory(multi_shims_node())
 
 
+def ensure_multi_locks_node():
+    _ensure_directory(multi_locks_node())
+
+
 def ensure_workspace(root):
     ensure_bin_node(root)
     ensure_shims_node(root)
+    ensure_lock_node(root)
     ensure_multi_root_node()
     ensure_multi_bin_node()
     ensure_multi_shims_node()
+    ensure_multi_locks_node()
+
+
+def add_references_arguments(subparser, help):
+    subparser.add_argument("references", nargs="*", help=help)
+    subparser.add_argument(
+        "--references-from",
+        metavar="FILE",
+        help=
+        "Read additional references from this file, or '-' for stdin, separated by newlines or NUL characters."
+    )
+
+
+def _split_entries(handle):
+    separator = None
+    pending = b""
+    for chunk in iter(lambda: handle.read(_ENTRIES_CHUNK_SIZE), b""):
+        if separator is None:
+            separator = b"\0" if b"\0" in chunk else b"\n"
+        entries = (pending + chunk).split(separator)
+        pending = entries.pop()
+        yield from entries
+    yield pending
+
+
+def _read_entries_from(path):
+    if path == "-":
+        yield from _split_entries(sys.stdin.buffer)
+    else:
+        with open(path, "rb") as handle:
+            yield from _split_entries(handle)
+
+
+def read_reference_arguments(args):
+    if not args.references and not args.references_from:
+        raise ValueError(
+            "No references given; pass references or --references-from"
+        )
+    yield from args.references
+    if args.references_from:
+        for entry in _read_entries_from(args.references_from):
+            reference = entry.decode("utf-8").strip()
+            if reference:
+                yield reference
+
+
+def add_roots_arguments(subparser, help):
+    subparser.add_argument("roots", nargs="*", help=help)
+    subparser.add_argument(
+        "--roots-from",
+        metavar="FILE",
+        help=
+        "Read additional workspace roots from this file, or '-' for stdin, separated by newlines or NUL characters."
+    )
+
+
+def read_root_arguments(args):
+    if not args.roots and not args.roots_from:
+        raise ValueError("No workspace roots given; pass roots or --roots-from")
+    yield from args.roots
+    if args.roots_from:
+        for entry in _read_entries_from(args.roots_from):
+            root = entry.decode("utf-8").strip()
+            if root:
+                yield root
+
+
+def add_bundle_argument(subparser):
+    subparser.add_argument(
+        "--bundle",
+        default=SASHIMMI_BUNDLE,
+        help=
+        "Load packages from this workspace bundle written by export, checking only the package nodes that are referenced."
+    )
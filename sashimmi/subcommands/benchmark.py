@@ -0,0 +1,331 @@
+import concurrent.futures
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from ._internal import ensure_root_node, ensure_workspace
+from .subcommand import SubcommandBase, register_subcommand
+from ..constants import SASHIMMI_PACKAGE_NODE, bin_node
+from ..models.reference import Reference
+from ..models.shim import (
+    BIND_MODES,
+    BIND_MODE_LAUNCHER,
+    BIND_MODE_SCRIPTS,
+    Shim,
+    bind_shims,
+    write_bind_mode,
+    write_shims_node,
+)
+from ..models.usage_log import read_usage, clear_usage, percentile
+
+BENCHMARK_PACKAGE_TEMPLATE = """\
+targets:
+  - name: {name}
+    actions:
+      - action: command
+        executable: "{executable}"
+"""
+
+BENCHMARK_TEMPLATE = """\
+  {scenario} ({calls} calls, {concurrency} concurrent)\
+"""
+
+PHASE_TEMPLATE = """\
+    {phase}: p50={p50:.1f}ms p95={p95:.1f}ms p99={p99:.1f}ms\
+"""
+
+BENCHMARK_SHIM_NAME = "noop"
+BENCHMARK_EXECUTABLE = "true"
+BENCHMARK_STUB_NODE = "stub-bin"
+BENCHMARK_STUBBED_COMMAND = "sashimmi"
+
+PHASE_BASELINE = "baseline"
+PHASE_PYTHON = "python"
+PHASE_IMPORT = "import"
+PHASE_SHIM_SCRIPT = "shim-script"
+PHASE_WALL = "wall"
+PHASE_RESOLUTION = "resolution"
+PHASE_LOCK_WAIT = "lock-wait"
+PHASES = [
+    PHASE_BASELINE,
+    PHASE_PYTHON,
+    PHASE_IMPORT,
+    PHASE_SHIM_SCRIPT,
+    PHASE_WALL,
+    PHASE_RESOLUTION,
+    PHASE_LOCK_WAIT,
+]
+
+# sashimmi itself is an empty namespace package; the command line module and
+# the subcommand registry are what every invocation imports.
+_IMPORT_CODE = "import sashimmi.__main__, sashimmi.subcommands"
+
+SCENARIO_SEQUENTIAL = "sequential"
+SCENARIO_CONCURRENT = "concurrent"
+
+PERCENTILES = {"p50": 0.50, "p95": 0.95, "p99": 0.99}
+
+
+def _parse_threshold(text):
+    phase, _, rest = text.partition(":")
+    name, _, milliseconds = rest.partition("=")
+    if phase not in PHASES or name not in PERCENTILES or not milliseconds:
+        raise ValueError(
+            "Threshold '{threshold}' is invalid; expected PHASE:PERCENTILE=MS with PHASE one of {phases} and PERCENTILE one of {percentiles}"
+            .format(
+                threshold=text,
+                phases=", ".join(PHASES),
+                percentiles=", ".join(sorted(PERCENTILES)),
+            )
+        )
+    return phase, name, float(milliseconds)
+
+
+def _make_benchmark_workspace(root, mode):
+    ensure_root_node(root)
+    ensure_workspace(root)
+    with open(os.path.join(root, SASHIMMI_PACKAGE_NODE), "w") as handle:
+        handle.write(
+            BENCHMARK_PACKAGE_TEMPLATE.format(
+                name=BENCHMARK_SHIM_NAME, executable=BENCHMARK_EXECUTABLE
+            )
+        )
+    shims = {
+        BENCHMARK_SHIM_NAME:
+        Shim(
+            BENCHMARK_SHIM_NAME,
+            Reference.make(
+                "//:{name}".format(name=BENCHMARK_SHIM_NAME), root, root
+            )
+        )
+    }
+    write_shims_node(root, shims)
+    write_bind_mode(root, mode)
+    bind_shims(root, shims, None)
+    return os.path.join(bin_node(root), BENCHMARK_SHIM_NAME)
+
+
+def _timed_call(arguments, environment):
+    started = time.monotonic()
+    subprocess.run(
+        arguments,
+        env=environment,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+    return time.monotonic() - started
+
+
+def _time_calls(arguments, environment, calls, concurrency):
+    if concurrency <= 1:
+        return [_timed_call(arguments, environment) for _ in range(calls)]
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=concurrency
+    ) as executor:
+        return list(
+            executor.map(
+                lambda _: _timed_call(arguments, environment), range(calls)
+            )
+        )
+
+
+def _find_benchmark_executable():
+    executable = shutil.which(BENCHMARK_EXECUTABLE)
+    if executable is None:
+        raise RuntimeError(
+            "Executable '{executable}' not found on PATH".format(
+                executable=BENCHMARK_EXECUTABLE
+            )
+        )
+    return executable
+
+
+def _import_environment(environment):
+    # Import the copy of sashimmi that runs the benchmark.
+    package_root = os.path.dirname(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    import_environment = environment.copy()
+    import_environment["PYTHONPATH"] = os.pathsep.join(
+        path for path in
+        (package_root, environment.get("PYTHONPATH")) if path
+    )
+    return import_environment
+
+
+def _stub_environment(root, environment, executable):
+    # The shim script runs, but its exec of sashimmi ends in a no-op, which
+    # leaves the cost of the interpreter running the script.
+    stub_root = os.path.join(root, BENCHMARK_STUB_NODE)
+    os.mkdir(stub_root)
+    os.symlink(
+        executable, os.path.join(stub_root, BENCHMARK_STUBBED_COMMAND)
+    )
+    stub_environment = environment.copy()
+    stub_environment["PATH"] = os.pathsep.join(
+        path for path in (stub_root, environment.get("PATH")) if path
+    )
+    return stub_environment
+
+
+def _phase_commands(root, shim, mode, environment, executable):
+    commands = [
+        (PHASE_BASELINE, [executable], environment),
+        (PHASE_PYTHON, [sys.executable, "-c", "pass"], environment),
+        (
+            PHASE_IMPORT,
+            [sys.executable, "-c", _IMPORT_CODE],
+            _import_environment(environment),
+        ),
+    ]
+    # Launcher shims do not go through the sashimmi command.
+    if mode != BIND_MODE_LAUNCHER:
+        commands.append((
+            PHASE_SHIM_SCRIPT,
+            [shim],
+            _stub_environment(root, environment, executable),
+        ))
+    return commands
+
+
+def _measure(root, shim, commands, environment, calls, concurrency):
+    phases = {}
+    for phase, arguments, phase_environment in commands:
+        phases[phase] = sorted(
+            _time_calls(arguments, phase_environment, calls, concurrency)
+        )
+    clear_usage(root)
+    wall = _time_calls([shim], environment, calls, concurrency)
+    usage = list(read_usage(root))
+    phases[PHASE_WALL] = sorted(wall)
+    phases[PHASE_RESOLUTION] = sorted(record.resolution for record in usage)
+    phases[PHASE_LOCK_WAIT] = sorted(record.lock_wait for record in usage)
+    return phases
+
+
+class BenchmarkSubcommand(SubcommandBase):
+    def name(self):
+        return "benchmark"
+
+    def help(self):
+        return "Measure end-to-end shim latency in a scratch workspace."
+
+    def configure_subparser(self, subparser):
+        subparser.add_argument(
+            "--mode",
+            choices=sorted(BIND_MODES.keys()),
+            default=BIND_MODE_SCRIPTS,
+            help="Bind mode of the benchmarked shim."
+        )
+        subparser.add_argument(
+            "--calls",
+            type=int,
+            default=1000,
+            help="Number of shim invocations per scenario."
+        )
+        subparser.add_argument(
+            "--warmup",
+            type=int,
+            default=10,
+            help="Number of untimed shim invocations before measuring."
+        )
+        subparser.add_argument(
+            "--concurrency",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of concurrent callers in the concurrent scenario."
+        )
+        subparser.add_argument(
+            "--threshold",
+            action="append",
+            default=[],
+            help=
+            "Fail when a phase percentile exceeds a limit in milliseconds, e.g. wall:p95=50. Phases are baseline, python, import, shim-script, wall, resolution and lock-wait."
+        )
+
+    def main(self, args):
+        thresholds = [
+            _parse_threshold(threshold) for threshold in args.threshold
+        ]
+        executable = _find_benchmark_executable()
+
+        root = os.path.realpath(
+            tempfile.mkdtemp(prefix="sashimmi-benchmark-")
+        )
+        try:
+            shim = _make_benchmark_workspace(root, args.mode)
+            environment = os.environ.copy()
+            environment["SASHIMMI_RECORD_USAGE"] = "1"
+            commands = _phase_commands(
+                root, shim, args.mode, environment, executable
+            )
+            _time_calls([shim], environment, args.warmup, 1)
+
+            results = []
+            for scenario, concurrency in [
+                (SCENARIO_SEQUENTIAL, 1),
+                (SCENARIO_CONCURRENT, args.concurrency),
+            ]:
+                logging.info(
+                    "Running %s scenario with %d calls", scenario, args.calls
+                )
+                results.append((
+                    scenario,
+                    concurrency,
+                    _measure(
+                        root,
+                        shim,
+                        commands,
+                        environment,
+                        args.calls,
+                        concurrency,
+                    ),
+                ))
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+        failures = []
+        print("Benchmark")
+        for scenario, concurrency, phases in results:
+            print(
+                BENCHMARK_TEMPLATE.format(
+                    scenario=scenario,
+                    calls=args.calls,
+                    concurrency=concurrency,
+                )
+            )
+            for phase in PHASES:
+                if phase not in phases:
+                    continue
+                values = {
+                    name: percentile(phases[phase], fraction) * 1000
+                    for name, fraction in PERCENTILES.items()
+                }
+                print(PHASE_TEMPLATE.format(phase=phase.upper(), **values))
+                for threshold_phase, name, limit in thresholds:
+                    if threshold_phase == phase and values[name] > limit:
+                        failures.append(
+                            "{scenario} {phase} {name}={value:.1f}ms exceeds {limit:.1f}ms"
+                            .format(
+                                scenario=scenario,
+                                phase=phase,
+                                name=name,
+                                value=values[name],
+                                limit=limit,
+                            )
+                        )
+
+        if failures:
+            raise RuntimeError(
+                "Latency thresholds exceeded: {failures}".format(
+                    failures="; ".join(failures)
+                )
+            )
+
+
+register_subcommand(BenchmarkSubcommand())
@@ -1,5 +1,10 @@
 from .subcommand import SubcommandBaseWithWorkspaceWriteLock, register_subcommand
-from ..models.shim import read_shims_node, bind_shims
+from ..models.shim import (
+    BIND_MODES,
+    read_shims_node,
+    bind_shims,
+    write_bind_mode,
+)
 
 
 class BindSubcommand(SubcommandBaseWithWorkspaceWriteLock):
@@ -16,12 +21,20 @@ class BindSubcommand(SubcommandBaseWithWorkspaceWriteLock):
             default=False,
             help="Bind shims in multi-namespace."
         )
+        subparser.add_argument(
+            "--mode",
+            choices=sorted(BIND_MODES.keys()),
+            help=
+            "Persistently select how shims are bound: one script per shim, one dispatcher with a symlink per shim, or one launcher per shim that runs the interpreter directly against a precompiled archive."
+        )
 
     def run_with_lock(self, args, workspace, lock):
+        if args.mode:
+            write_bind_mode(workspace.root, args.mode)
         shims = read_shims_node(workspace.root)
         bind_shims(
             workspace.root, shims,
-            self.make_multi_lock() if args.multi else None
+            self.make_multi_lock if args.multi else None
         )
 
 
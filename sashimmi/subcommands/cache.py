@@ -0,0 +1,69 @@
+import logging
+
+from ._internal import find_root_directory
+from .subcommand import SubcommandBase, register_subcommand
+from ..models.output_cache import OutputCache
+from ..models.parse_cache import ParseCache
+
+
+def _print_size(label, count, size):
+    print(
+        "  {label}: {count} entries, {size} bytes".format(
+            label=label, count=count, size=size
+        )
+    )
+
+
+class CacheSubcommand(SubcommandBase):
+    def name(self):
+        return "cache"
+
+    def help(self):
+        return "Inspect or prune the package parse cache and output cache."
+
+    def configure_subparser(self, subparser):
+        subparser.add_argument(
+            "operation",
+            choices=["stats", "prune"],
+            help="Print cache usage, or evict entries down to a size limit."
+        )
+        subparser.add_argument(
+            "--max-size",
+            type=int,
+            default=None,
+            help="Size limit in bytes to prune to instead of the default."
+        )
+
+    def main(self, args):
+        parse_cache = ParseCache()
+        try:
+            output_cache = OutputCache(find_root_directory(args.root))
+        except RuntimeError:
+            output_cache = None
+
+        if args.operation == "prune":
+            removed = parse_cache.evict(max_size=args.max_size)
+            logging.info(
+                "Pruned %d entries from parse cache %s", removed,
+                parse_cache.node
+            )
+            if output_cache:
+                removed = output_cache.evict(max_size=args.max_size)
+                logging.info(
+                    "Pruned %d entries from output cache %s", removed,
+                    output_cache.node
+                )
+            return
+
+        print("Parse cache ({node})".format(node=parse_cache.node))
+        _print_size("packages", *parse_cache.stats())
+        if output_cache:
+            print("Output cache ({node})".format(node=output_cache.node))
+            _print_size("outputs", *output_cache.usage())
+            hits, misses = output_cache.stats()
+            print("  hits: {hits}, misses: {misses}".format(
+                hits=hits, misses=misses
+            ))
+
+
+register_subcommand(CacheSubcommand())
@@ -21,7 +21,7 @@ class CleanSubcommand(SubcommandBaseWithWorkspaceWriteLock):
         write_shims_node(workspace.root, {})
         bind_shims(
             workspace.root, {},
-            self.make_multi_lock() if args.multi else None
+            self.make_multi_lock if args.multi else None
         )
 
 
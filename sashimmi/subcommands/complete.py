@@ -0,0 +1,87 @@
+from .subcommand import SubcommandBase, register_subcommand, get_subcommands
+from ..models.completion import print_completions
+
+BASH_COMPLETION_TEMPLATE = """\
+_sashimmi_complete() {{
+    local cur
+    if declare -F _get_comp_words_by_ref >/dev/null; then
+        _get_comp_words_by_ref -n : cur
+    else
+        cur="${{COMP_WORDS[COMP_CWORD]}}"
+    fi
+    if [ "$COMP_CWORD" -eq 1 ]; then
+        COMPREPLY=($(compgen -W "{subcommands}" -- "$cur"))
+        return
+    fi
+    case "$cur" in
+        -*) return ;;
+    esac
+    local IFS=$'\\n'
+    COMPREPLY=($(sashimmi complete -- "$cur" 2>/dev/null))
+    compopt -o nospace 2>/dev/null
+    if declare -F __ltrim_colon_completions >/dev/null; then
+        __ltrim_colon_completions "$cur"
+    fi
+}}
+complete -F _sashimmi_complete sashimmi
+"""
+
+ZSH_COMPLETION_TEMPLATE = """\
+_sashimmi_complete() {{
+    if (( CURRENT == 2 )); then
+        compadd -- {subcommands}
+        return
+    fi
+    [[ "${{words[CURRENT]}}" == -* ]] && return
+    local -a candidates
+    candidates=("${{(@f)$(sashimmi complete -- "${{words[CURRENT]}}" 2>/dev/null)}}")
+    compadd -S '' -Q -- "${{candidates[@]}}"
+}}
+compdef _sashimmi_complete sashimmi
+"""
+
+COMPLETION_TEMPLATES = {
+    "bash": BASH_COMPLETION_TEMPLATE,
+    "zsh": ZSH_COMPLETION_TEMPLATE,
+}
+
+
+class CompleteSubcommand(SubcommandBase):
+    def name(self):
+        return "complete"
+
+    def help(self):
+        return "Complete a partial reference, or print shell completion code."
+
+    def configure_subparser(self, subparser):
+        subparser.add_argument(
+            "word", nargs="?", default="", help="Partial reference to complete."
+        )
+        subparser.add_argument(
+            "--script",
+            choices=sorted(COMPLETION_TEMPLATES.keys()),
+            help="Print completion code for this shell instead."
+        )
+        subparser.add_argument(
+            "--refresh",
+            action="store_true",
+            default=False,
+            help="Rebuild the cached reference list before completing."
+        )
+
+    def main(self, args):
+        if args.script:
+            subcommands = sorted(
+                subcommand.name() for subcommand in get_subcommands()
+            )
+            print(
+                COMPLETION_TEMPLATES[args.script].format(
+                    subcommands=" ".join(subcommands)
+                ),
+                end="",
+            )
+        else:
+            print_completions(args.root, args.word, refresh=args.refresh)
+
+
+register_subcommand(CompleteSubcommand())
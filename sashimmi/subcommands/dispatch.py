@@ -0,0 +1,44 @@
+import argparse
+
+from ._internal import find_root_directory, ensure_workspace
+from .run import run_target
+from .subcommand import SubcommandBase, register_subcommand
+from ..models.shim import read_installed_shims
+
+
+class DispatchSubcommand(SubcommandBase):
+    def name(self):
+        return "dispatch"
+
+    def help(self):
+        return "Run the target installed under this shim name."
+
+    def configure_subparser(self, subparser):
+        subparser.add_argument(
+            "shim", help="Name of the installed shim to run."
+        )
+        subparser.add_argument(
+            "arguments",
+            nargs=argparse.REMAINDER,
+            help="Arguments to pass to command"
+        )
+
+    def main(self, args):
+        root = find_root_directory(args.root)
+        ensure_workspace(root)
+        shims = read_installed_shims(root)
+        if args.shim not in shims:
+            raise KeyError(
+                "Shim '{name}' is not installed in workspace {root}".format(
+                    name=args.shim, root=root
+                )
+            )
+        run_target(
+            root,
+            str(shims[args.shim].reference),
+            args.arguments,
+            args.discovery,
+        )
+
+
+register_subcommand(DispatchSubcommand())
@@ -0,0 +1,26 @@
+import logging
+import os
+
+from .subcommand import SubcommandBaseWithWorkspaceReadLock, register_subcommand
+from ..models.bundle import write_workspace_bundle
+
+
+class ExportSubcommand(SubcommandBaseWithWorkspaceReadLock):
+    def name(self):
+        return "export"
+
+    def help(self):
+        return "Write all packages and targets to a bundle that run and target can load."
+
+    def configure_subparser(self, subparser):
+        subparser.add_argument(
+            "bundle", help="Path of the workspace bundle to write."
+        )
+
+    def run_with_lock(self, args, workspace, lock):
+        path = os.path.abspath(args.bundle)
+        count = write_workspace_bundle(workspace, path)
+        logging.info("Exported %d packages to %s", count, path)
+
+
+register_subcommand(ExportSubcommand())
@@ -1,11 +1,10 @@
-import logging
-
-from .subcommand import SubcommandBaseWithWorkspaceWriteLock, register_subcommand
+from ._internal import add_references_arguments, read_reference_arguments
+from .subcommand import SubcommandBaseWithShimChanges, register_subcommand
+from ..models.pending import ShimChanges
 from ..models.reference import Reference
-from ..models.shim import Shim, read_shims_node, write_shims_node, bind_shims
 
 
-class InstallSubcommand(SubcommandBaseWithWorkspaceWriteLock):
+class InstallSubcommand(SubcommandBaseWithShimChanges):
     def name(self):
         return "install"
 
@@ -13,9 +12,8 @@ class InstallSubcommand(SubcommandBaseWithWorkspaceWriteLock):
         return "Install shims for these targets."
 
     def configure_subparser(self, subparser):
-        subparser.add_argument(
-            "references",
-            nargs="+",
+        add_references_arguments(
+            subparser,
             help=
             "References of the targets which map to commands. Targets listed later take precedence."
         )
@@ -33,41 +31,21 @@ class InstallSubcommand(SubcommandBaseWithWorkspaceWriteLock):
             help="Bind shims in multi-namespace."
         )
 
-    def run_with_lock(self, args, workspace, lock):
+    def shim_changes(self, args, workspace):
         target_references = [
             Reference.make(reference, workspace.root)
-            for reference in args.references
+            for reference in read_reference_arguments(args)
         ]
 
-        shims = read_shims_node(workspace.root)
+        installs = []
         for reference in target_references:
             for target in workspace.find_targets(reference):
-                name = target.reference.target_name
-                if name in shims:
-                    if force:
-                        logging.warning(
-                            "Overwriting shim '%s' with target '%st}'",
-                            name,
-                            target.reference,
-                        )
-                    else:
-                        raise ValueError(
-                            "Shim '{name}' is already installed".format(
-                                name=name
-                            )
-                        )
-                else:
-                    logging.info(
-                        "Installing shim '%s' with target '%s'",
-                        name,
-                        target.reference,
-                    )
-                shims[name] = Shim(name, target.reference)
+                installs.append(
+                    (target.reference.target_name, str(target.reference))
+                )
 
-        write_shims_node(workspace.root, shims)
-        bind_shims(
-            workspace.root, shims,
-            self.make_multi_lock() if args.multi else None
+        return ShimChanges(
+            installs=installs, force=args.force, multi=args.multi
         )
 
 
@@ -0,0 +1,63 @@
+import contextlib
+import logging
+import os
+
+from ._internal import (
+    add_roots_arguments,
+    find_root_directory,
+    ensure_workspace,
+    read_root_arguments,
+)
+from .subcommand import (
+    ShardedLock,
+    SubcommandBase,
+    WorkspaceWriteLock,
+    register_subcommand,
+)
+from ..constants import lock_node
+from ..models.multi_bind import bind_multi_workspaces
+from ..models.shim import read_shims_node
+
+
+class MultiBindSubcommand(SubcommandBase):
+    def name(self):
+        return "multi-bind"
+
+    def help(self):
+        return "Bind the shims of many workspaces in multi-namespace in one pass."
+
+    def configure_subparser(self, subparser):
+        add_roots_arguments(
+            subparser,
+            help="Roots of the workspaces whose shims are bound."
+        )
+
+    def main(self, args):
+        roots = []
+        for argument in read_root_arguments(args):
+            root = find_root_directory(os.path.abspath(argument))
+            if root not in roots:
+                roots.append(root)
+
+        with contextlib.ExitStack() as stack:
+            # Workspace locks are taken in path order so that overlapping
+            # batches cannot deadlock.
+            for root in sorted(roots):
+                ensure_workspace(root)
+                stack.enter_context(WorkspaceWriteLock(lock_node(root)))
+            result = bind_multi_workspaces(
+                {root: read_shims_node(root) for root in roots},
+                lambda names: ShardedLock(WorkspaceWriteLock, names),
+            )
+
+        logging.info(
+            "Bound %d workspaces: %d bin entries rewritten, %d links created, %d removed, %d unchanged",
+            len(roots),
+            result.bin_changes,
+            result.created,
+            result.removed,
+            result.unchanged,
+        )
+
+
+register_subcommand(MultiBindSubcommand())
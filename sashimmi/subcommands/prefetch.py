@@ -0,0 +1,163 @@
+import concurrent.futures
+import json
+import logging
+import subprocess
+
+from .subcommand import (
+    SubcommandBaseWithWorkspace,
+    WorkspaceWriteLock,
+    register_subcommand,
+)
+from ..actions.docker import DockerAction
+from ..constants import SASHIMMI_DOCKER, lock_node
+from ..models.image_digests import read_image_digests, write_image_digests
+from ..models.reference import Reference
+from ..models.reference_table import invalidate_reference_table
+from ..models.shim import read_installed_shims
+
+
+def _repository(image):
+    name = image.partition("@")[0]
+    last_component = name.rpartition("/")[2]
+    if ":" in last_component:
+        name = name[:name.rindex(":")]
+    return name
+
+
+def _pull_image(image):
+    process = subprocess.run(
+        [SASHIMMI_DOCKER, "pull", "--quiet", image],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(
+            "Failed to pull image {image}: {error}".format(
+                image=image,
+                error=process.stderr.decode("utf-8", "replace").strip(),
+            )
+        )
+
+
+def _resolve_digest(image):
+    process = subprocess.run(
+        [
+            SASHIMMI_DOCKER, "image", "inspect", "--format",
+            "{{json .RepoDigests}}", image
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    )
+    digests = json.loads(process.stdout.decode("utf-8")) or []
+    repository = _repository(image)
+    for digest in digests:
+        if digest.partition("@")[0] == repository:
+            return digest
+    return digests[0] if digests else None
+
+
+def _prefetch_image(image, pin):
+    _pull_image(image)
+    return _resolve_digest(image) if pin else None
+
+
+class PrefetchSubcommand(SubcommandBaseWithWorkspace):
+    def name(self):
+        return "prefetch"
+
+    def help(self):
+        return "Pull the docker images used by installed shims or these targets."
+
+    def configure_subparser(self, subparser):
+        subparser.add_argument(
+            "references",
+            nargs="*",
+            help=
+            "References of the targets whose images to pull. Defaults to all installed shims."
+        )
+        subparser.add_argument(
+            "--jobs",
+            type=int,
+            default=4,
+            help="Maximum number of concurrent pulls."
+        )
+        subparser.add_argument(
+            "--pin",
+            action="store_true",
+            default=False,
+            help="Record resolved image digests so shims run by digest."
+        )
+
+    def __collect_images(self, args, workspace):
+        if args.references:
+            references = [
+                Reference.make(reference, workspace.root)
+                for reference in args.references
+            ]
+        else:
+            shims = read_installed_shims(workspace.root)
+            references = [shim.reference for shim in shims.values()]
+
+        images = []
+        for reference in references:
+            for target in workspace.find_targets(reference):
+                for action in target.find_actions(DockerAction):
+                    if action.image not in images:
+                        images.append(action.image)
+        return images
+
+    def run(self, args, workspace):
+        if args.jobs < 1:
+            raise ValueError("--jobs must be at least 1")
+
+        images = self.__collect_images(args, workspace)
+        if not images:
+            print("No docker images referenced")
+            return
+
+        digests = {}
+        failures = []
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=args.jobs
+        ) as executor:
+            futures = {
+                executor.submit(_prefetch_image, image, args.pin): image
+                for image in images
+            }
+            for future in concurrent.futures.as_completed(futures):
+                image = futures[future]
+                try:
+                    digest = future.result()
+                except (OSError, RuntimeError,
+                        subprocess.CalledProcessError) as error:
+                    logging.error("%s", error)
+                    failures.append(image)
+                    continue
+                logging.info("Pulled image %s", image)
+                if args.pin:
+                    if digest:
+                        digests[image] = digest
+                    else:
+                        logging.warning(
+                            "Image %s has no repository digest to pin", image
+                        )
+
+        if digests:
+            with WorkspaceWriteLock(lock_node(workspace.root)):
+                pinned = read_image_digests(workspace.root)
+                pinned.update(digests)
+                write_image_digests(workspace.root, pinned)
+                invalidate_reference_table(workspace.root)
+            for image in sorted(digests.keys()):
+                logging.info("Pinned image %s to %s", image, digests[image])
+
+        if failures:
+            raise RuntimeError(
+                "Failed to pull {count} of {total} images".format(
+                    count=len(failures), total=len(images)
+                )
+            )
+
+
+register_subcommand(PrefetchSubcommand())
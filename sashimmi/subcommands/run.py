@@ -1,7 +1,176 @@
+import argparse
 import os
+import sys
+import time
 
-from .subcommand import SubcommandBaseWithWorkspaceReadLock, register_subcommand
-from ..models.reference import Reference
+from ._internal import (
+    add_bundle_argument,
+    find_root_directory,
+    ensure_workspace,
+)
+from .subcommand import (
+    SubcommandBaseWithWorkspaceReadLock,
+    WorkspaceReadLock,
+    register_subcommand,
+)
+from ..actions.cached import CachedAction
+from ..actions.pipeline import PipelineAction
+from ..actions.python import PythonAction
+from ..constants import lock_node
+from ..models.bundle import load_workspace_bundle
+from ..models.launch import (
+    find_reference_record,
+    is_launchable,
+    exec_reference_record,
+)
+from ..models.reference import Reference, resolve_mount
+from ..models.reference_table import write_reference_table
+from ..models.snapshot import load_workspace_snapshot, export_workspace_snapshot
+from ..models.usage_log import record_usage
+from ..models.workspace import Workspace
+
+
+def _make_target_reference(argument, root):
+    reference = Reference.make(argument, root)
+    if not reference.target_name:
+        raise ValueError(
+            "Reference argument {argument} does not contain a target name".
+            format(argument=reference)
+        )
+    return reference
+
+
+def _is_direct(target):
+    return (
+        not target.find_actions(CachedAction)
+        and not target.find_actions(PipelineAction)
+        and not PythonAction.find_in_process(target)
+    )
+
+
+def _exec(arguments, variables):
+    environment = os.environ.copy()
+    environment.update(variables)
+    os.execvpe(arguments[0], arguments, environment)
+
+
+def _scheduled(target, launch):
+    # Hints are applied to this process right before the command starts, so
+    # exec'd, cached and in-process commands all inherit them.
+    def scheduled_launch():
+        target.scheduling.apply()
+        return launch()
+
+    return scheduled_launch
+
+
+def run_target(root, reference_argument, arguments, discovery, bundle=None):
+    started = time.monotonic()
+
+    # Targets in mounted workspaces run entirely against the mount: its
+    # own reference table, snapshot and lock.
+    reference = _make_target_reference(reference_argument, root)
+    bundle = None if reference.mount_path else bundle
+    root, reference = resolve_mount(root, reference)
+    ensure_workspace(root)
+    record, lock_wait = find_reference_record(root, reference)
+    if is_launchable(record, arguments):
+        exec_reference_record(
+            root, reference, record, arguments, started, lock_wait
+        )
+
+    source = "snapshot"
+    workspace = load_workspace_snapshot(root)
+    if workspace and reference.package_part not in workspace.packages:
+        workspace = None
+    if workspace is None and bundle:
+        # Bundled packages are only verified when referenced, so they
+        # must not leak into the snapshot or the reference table.
+        source = "bundle"
+        workspace = load_workspace_bundle(root, bundle, discovery=discovery)
+    if workspace is None:
+        source = "workspace"
+        workspace = Workspace.make(root, discovery=discovery)
+        export_workspace_snapshot(workspace)
+    if record is None and source != "bundle":
+        write_reference_table(workspace, _is_direct)
+    with WorkspaceReadLock(lock_node(root)) as lock:
+        launch = launch_target(workspace, reference, arguments)
+    lock_wait += lock.wait_time
+
+    record_usage(
+        root, reference, time.monotonic() - started, lock_wait, source
+    )
+    sys.exit(launch())
+
+
+def launch_target(workspace, reference, caller_arguments):
+    targets = list(workspace.find_targets(reference))
+    if len(targets) > 1:
+        raise ValueError(
+            "Reference argument {argument} produces multiple targets".
+            format(argument=reference)
+        )
+    target = targets[0]
+
+    arguments, variables = target.adapt(
+        caller_arguments, apply_substitutions=True
+    )
+
+    pipeline_actions = target.find_actions(PipelineAction)
+    if pipeline_actions:
+        if caller_arguments:
+            raise ValueError(
+                "Target {reference} runs a pipeline, which takes no arguments"
+                .format(reference=target.reference)
+            )
+        if (
+            len(pipeline_actions) > 1 or arguments
+            or target.find_actions(CachedAction)
+        ):
+            raise ValueError(
+                "Target {reference} combines a pipeline with other commands"
+                .format(reference=target.reference)
+            )
+        environment = os.environ.copy()
+        environment.update(variables)
+        return _scheduled(
+            target,
+            lambda: pipeline_actions[0].execute(target, environment),
+        )
+
+    if not arguments:
+        raise ValueError(
+            "Target {reference} produces no command line".format(
+                reference=target.reference
+            )
+        )
+
+    python_action = PythonAction.find_in_process(target)
+    if python_action:
+        return _scheduled(
+            target, lambda: python_action.execute(
+                target, variables, caller_arguments
+            )
+        )
+
+    environment = os.environ.copy()
+    environment.update(variables)
+
+    cached_actions = target.find_actions(CachedAction)
+    if cached_actions:
+        if len(cached_actions) > 1:
+            raise ValueError(
+                "Target {reference} declares multiple cached actions".
+                format(reference=target.reference)
+            )
+        return _scheduled(
+            target, lambda: cached_actions[0].execute(
+                target, arguments, variables, environment
+            )
+        )
+
+    return _scheduled(target, lambda: _exec(arguments, variables))
 
 
 class RunSubcommand(SubcommandBaseWithWorkspaceReadLock):
@@ -17,37 +186,27 @@ class RunSubcommand(SubcommandBaseWithWorkspaceReadLock):
             help="Reference of the target which maps to a command."
         )
         subparser.add_argument(
-            "arguments", nargs="*", help="Arguments to pass to command"
+            "arguments",
+            nargs=argparse.REMAINDER,
+            help="Arguments to pass to command"
         )
+        add_bundle_argument(subparser)
 
-    def run_with_lock(self, args, workspace, lock):
-        reference = Reference.make(args.reference, workspace.root)
-        if not reference.target_name:
-            raise ValueError(
-                "Reference argument {argument} does not contain a target name".
-                format(argument=reference)
-            )
-
-        targets = list(workspace.find_targets(reference))
-        if len(targets) > 1:
-            raise ValueError(
-                "Reference argument {argument} produces multiple targets".
-                format(argument=reference)
-            )
-        target = targets[0]
-
-        arguments, variables = target.adapt(apply_substitutions=True)
-        if not arguments:
-            raise ValueError(
-                "Target {reference} produces no command line".format(
-                    reference=target.reference
-                )
-            )
-
-        environment = os.environ.copy()
-        environment.update(variables)
+    def main(self, args):
+        run_target(
+            find_root_directory(args.root),
+            args.reference,
+            args.arguments,
+            args.discovery,
+            bundle=args.bundle,
+        )
 
-        os.execvpe(arguments[0], arguments, environment)
+    def run_with_lock(self, args, workspace, lock):
+        return launch_target(
+            workspace,
+            _make_target_reference(args.reference, workspace.root),
+            args.arguments,
+        )
 
 
 register_subcommand(RunSubcommand())
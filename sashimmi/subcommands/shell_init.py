@@ -0,0 +1,179 @@
+import os
+import shlex
+
+from ._internal import find_root_directory, ensure_workspace
+from .run import _is_direct
+from .subcommand import SubcommandBase, WorkspaceReadLock, register_subcommand
+from ..constants import (
+    image_digests_node,
+    lock_node,
+    shims_node,
+    shims_database_node,
+)
+from ..models.reference import resolve_mount
+from ..models.reference_table import (
+    lookup_reference_table,
+    write_reference_table,
+)
+from ..models.shim import read_installed_shims
+from ..models.workspace import Workspace
+
+# Works in both bash and zsh. Resolutions are cached per session and reused
+# until shims or the target's package node are newer than the stamp written
+# when they were resolved, or SASHIMMI_DOCKER names another command; targets
+# that cannot run directly fall back to run, as do calls whose arguments need
+# run's % substitutions.
+SHELL_INIT_TEMPLATE = """\
+typeset -gA _sashimmi_argv _sashimmi_env _sashimmi_nodes _sashimmi_docker
+_sashimmi_stamps="${{TMPDIR:-/tmp}}/sashimmi-shell.$$"
+command mkdir -p -m 700 "$_sashimmi_stamps"
+_sashimmi_call() {{
+    local root="$1" name="$2" reference="$3" stamp node resolution stale=1
+    shift 3
+    stamp="$_sashimmi_stamps/$name"
+    if [[ -n "${{_sashimmi_nodes[$name]+set}}" && -e "$stamp" ]]; then
+        stale=0
+        local -a nodes
+        eval "nodes=(${{_sashimmi_nodes[$name]}})"
+        for node in "${{nodes[@]}}"; do
+            if [[ "$node" -nt "$stamp" ]]; then
+                stale=1
+                break
+            fi
+        done
+        if [[ -n "${{_sashimmi_docker[$name]}}" && "${{_sashimmi_docker[$name]}}" != "${{SASHIMMI_DOCKER:-docker}}" ]]; then
+            stale=1
+        fi
+    fi
+    if (( stale )); then
+        unset "_sashimmi_argv[$name]" "_sashimmi_env[$name]" "_sashimmi_nodes[$name]" "_sashimmi_docker[$name]"
+        : >| "$stamp"
+        resolution="$(command sashimmi --root="$root" shell-init --resolve "$name")" || return
+        eval "$resolution"
+    fi
+    if [[ -z "${{_sashimmi_argv[$name]}}" || "$*" == *%* ]]; then
+        command sashimmi --root="$root" run "$reference" "$@"
+        return
+    fi
+    (
+        if [[ -n "${{_sashimmi_env[$name]}}" ]]; then
+            eval "export ${{_sashimmi_env[$name]}}"
+        fi
+        eval "exec ${{_sashimmi_argv[$name]}} \\"\\$@\\""
+    )
+}}
+"""
+
+SHELL_FUNCTION_TEMPLATE = """\
+{name}() {{ _sashimmi_call {root} {name} {reference} "$@"; }}
+"""
+
+SHELL_RESOLUTION_TEMPLATE = """\
+_sashimmi_argv[{name}]={arguments}
+_sashimmi_env[{name}]={variables}
+_sashimmi_nodes[{name}]={nodes}
+_sashimmi_docker[{name}]={docker}
+"""
+
+
+def _quote_words(words):
+    return shlex.quote(" ".join(shlex.quote(word) for word in words))
+
+
+def _resolve_record(root, reference, discovery):
+    record = lookup_reference_table(root, reference)
+    if record is None:
+        write_reference_table(
+            Workspace.make(root, discovery=discovery), _is_direct
+        )
+        record = lookup_reference_table(root, reference)
+    if record is None:
+        raise KeyError(
+            "Target {reference} not found in workspace {root}".format(
+                reference=reference, root=root
+            )
+        )
+    return record
+
+
+class ShellInitSubcommand(SubcommandBase):
+    def name(self):
+        return "shell-init"
+
+    def help(self):
+        return "Print shell functions that run installed shims without their scripts."
+
+    def configure_subparser(self, subparser):
+        subparser.add_argument(
+            "--resolve",
+            metavar="SHIM",
+            help=
+            "Print the cached resolution of this shim; used by the shell functions."
+        )
+
+    def main(self, args):
+        root = find_root_directory(args.root)
+        ensure_workspace(root)
+        shims = read_installed_shims(root)
+
+        if args.resolve:
+            self.__print_resolution(root, shims, args.resolve, args.discovery)
+            return
+
+        print(SHELL_INIT_TEMPLATE.format(), end="")
+        for name, shim in sorted(shims.items()):
+            print(
+                SHELL_FUNCTION_TEMPLATE.format(
+                    name=name,
+                    root=shlex.quote(root),
+                    reference=shlex.quote(str(shim.reference)),
+                ),
+                end="",
+            )
+
+    def __print_resolution(self, root, shims, name, discovery):
+        if name not in shims:
+            raise KeyError(
+                "Shim '{name}' is not installed in workspace {root}".format(
+                    name=name, root=root
+                )
+            )
+        nodes = [
+            shims_node(root),
+            shims_database_node(root),
+            shims_database_node(root) + "-wal",
+        ]
+
+        target_root, reference = resolve_mount(root, shims[name].reference)
+        with WorkspaceReadLock(lock_node(target_root)):
+            record = _resolve_record(target_root, reference, discovery)
+        nodes.append(os.path.join(target_root, record.node))
+        nodes.append(image_digests_node(target_root))
+
+        # Scheduling hints are applied by run, so those targets fall back, as
+        # do targets whose caller arguments do not simply go last.
+        if (
+            record.direct and record.arguments and record.appends_arguments
+            and not record.scheduling
+        ):
+            arguments = record.arguments
+            variables = [
+                "{key}={value}".format(key=key, value=value)
+                for key, value in sorted(record.variables.items())
+            ]
+        else:
+            arguments = []
+            variables = []
+        print(
+            SHELL_RESOLUTION_TEMPLATE.format(
+                name=name,
+                arguments=_quote_words(arguments),
+                variables=_quote_words(variables),
+                nodes=_quote_words(nodes),
+                docker=shlex.quote(record.docker or ""),
+            ),
+            end="",
+        )
+
+
+register_subcommand(ShellInitSubcommand())
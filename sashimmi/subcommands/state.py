@@ -0,0 +1,55 @@
+import logging
+
+from .subcommand import SubcommandBaseWithWorkspaceWriteLock, register_subcommand
+from ..constants import shims_node, shims_database_node
+from ..models.shim import (
+    shims_database_enabled,
+    import_shims_database,
+    export_shims_database,
+)
+
+
+class StateSubcommand(SubcommandBaseWithWorkspaceWriteLock):
+    def name(self):
+        return "state"
+
+    def help(self):
+        return "Manage the backend that stores installed shims."
+
+    def configure_subparser(self, subparser):
+        subparser.add_argument(
+            "operation",
+            choices=["status", "import", "export"],
+            help=
+            "Print the active backend, import shims.yaml into the SQLite backend, or export the SQLite backend to shims.yaml."
+        )
+        subparser.add_argument(
+            "--disable",
+            action="store_true",
+            default=False,
+            help="Remove the SQLite backend after exporting it."
+        )
+
+    def run_with_lock(self, args, workspace, lock):
+        root = workspace.root
+        if args.operation == "status":
+            if shims_database_enabled(root):
+                print("sqlite: {node}".format(node=shims_database_node(root)))
+            else:
+                print("yaml: {node}".format(node=shims_node(root)))
+        elif args.operation == "import":
+            shims = import_shims_database(root)
+            logging.info(
+                "Imported %d shims into %s", len(shims),
+                shims_database_node(root)
+            )
+        else:
+            if not shims_database_enabled(root):
+                raise RuntimeError(
+                    "No SQLite backend to export in {root}".format(root=root)
+                )
+            shims = export_shims_database(root, disable=args.disable)
+            logging.info("Exported %d shims to %s", len(shims), shims_node(root))
+
+
+register_subcommand(StateSubcommand())
@@ -0,0 +1,78 @@
+from ._internal import find_root_directory
+from .subcommand import SubcommandBase, register_subcommand
+from ..constants import lock_node
+from ..models.lock import WorkspaceWriteLock
+from ..models.shim import read_shims_node
+from ..models.usage_log import (
+    compact_usage,
+    clear_usage,
+    histogram_percentile,
+)
+
+STATS_TEMPLATE = """\
+  {reference} ({shims})
+    CALLS: {calls} ({table} from reference table)
+    RESOLUTION: p50={p50:.1f}ms p95={p95:.1f}ms p99={p99:.1f}ms
+    LOCK WAIT: p50={lock_p50:.1f}ms p95={lock_p95:.1f}ms p99={lock_p99:.1f}ms\
+"""
+
+
+def _milliseconds(histogram, fraction):
+    return histogram_percentile(histogram, fraction) * 1000
+
+
+class StatsSubcommand(SubcommandBase):
+    def name(self):
+        return "stats"
+
+    def help(self):
+        return "Print per-shim usage and overhead recorded by run."
+
+    def configure_subparser(self, subparser):
+        subparser.add_argument(
+            "--clear",
+            action="store_true",
+            default=False,
+            help="Discard the recorded usage instead of printing it."
+        )
+
+    def main(self, args):
+        root = find_root_directory(args.root)
+        with WorkspaceWriteLock(lock_node(root)):
+            if args.clear:
+                clear_usage(root)
+                return
+            usage = compact_usage(root)
+        if not usage:
+            print(
+                "No usage recorded in workspace; set SASHIMMI_RECORD_USAGE=1 to record it"
+            )
+            return
+
+        shim_names = {}
+        for shim in read_shims_node(root).values():
+            shim_names.setdefault(str(shim.reference), []).append(shim.name)
+
+        print("Usage")
+        for reference, summary in sorted(
+            usage.items(), key=lambda item: -item[1].calls
+        ):
+            print(
+                STATS_TEMPLATE.format(
+                    reference=reference,
+                    shims=", ".join(
+                        sorted(shim_names.get(reference, ["not installed"]))
+                    ),
+                    calls=summary.calls,
+                    table=summary.table,
+                    p50=_milliseconds(summary.resolution, 0.50),
+                    p95=_milliseconds(summary.resolution, 0.95),
+                    p99=_milliseconds(summary.resolution, 0.99),
+                    lock_p50=_milliseconds(summary.lock_wait, 0.50),
+                    lock_p95=_milliseconds(summary.lock_wait, 0.95),
+                    lock_p99=_milliseconds(summary.lock_wait, 0.99),
+                )
+            )
+
+
+register_subcommand(StatsSubcommand())
@@ -1,11 +1,20 @@
 import abc
-import fcntl
-import os
-import stat
-
-from ..constants import lock_node, multi_lock_node
+import hashlib
+
+from ..constants import (
+    SASHIMMI_MULTI_LOCK_SHARDS,
+    lock_node,
+    multi_lock_shard_node,
+)
+from ..models.lock import WorkspaceReadLock, WorkspaceWriteLock
+from ..models.pending import (
+    enqueue_shim_changes,
+    discard_shim_changes,
+    take_shim_changes_result,
+    commit_pending_shim_changes,
+)
 from ..models.workspace import Workspace
-from ._internal import find_root_directory, ensure_workspace
+from ._internal import ensure_lock_node, ensure_workspace, find_root_directory
 
 SUBCOMMAND_REGISTRY = {}
 
@@ -29,55 +38,37 @@ def get_subcommands():
     yield from SUBCOMMAND_REGISTRY.values()
 
 
-class WorkspaceLockBase(metaclass=abc.ABCMeta):
-    def __init__(self, name):
-        self.name = name
-        self.fd = None
+def _multi_lock_shard(name):
+    digest = hashlib.sha256(name.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") % SASHIMMI_MULTI_LOCK_SHARDS
+
+
+class ShardedLock:
+    def __init__(self, make_lock, names):
+        # Shards are always taken in ascending order so that two processes
+        # locking overlapping name sets cannot deadlock.
+        self.shards = sorted({_multi_lock_shard(name) for name in names})
+        self.locks = [
+            make_lock(multi_lock_shard_node(shard)) for shard in self.shards
+        ]
+        self.wait_time = 0.0
 
     def __enter__(self):
-        self.fd = self.open(self.name)
-        os.chmod(
-            self.name,
-            stat.S_ISGID | stat.S_ENFMT | stat.S_IRUSR | stat.S_IWUSR |
-            stat.S_IRGRP | stat.S_IWGRP | stat.S_IROTH,
-        )
-        self.lock(self.fd)
+        acquired = []
+        try:
+            for lock in self.locks:
+                lock.__enter__()
+                acquired.append(lock)
+                self.wait_time += lock.wait_time
+        except BaseException:
+            for lock in reversed(acquired):
+                lock.__exit__(None, None, None)
+            raise
         return self
 
     def __exit__(self, exception_type, exception_value, traceback):
-        fcntl.flock(self.fd, fcntl.LOCK_UN)
-        self.fd.close()
-        self.fd = None
-
-    @abc.abstractmethod
-    def open(self, name):
-        pass
-
-    @abc.abstractmethod
-    def lock(self, fd):
-        pass
-
-
-class WorkspaceReadLock(WorkspaceLockBase):
-    def __init__(self, name):
-        super().__init__(name)
-
-    def open(self, name):
-        return open(name, "r")
-
-    def lock(self, fd):
-        fcntl.flock(fd, fcntl.LOCK_SH)
-
-
-class WorkspaceWriteLock(WorkspaceLockBase):
-    def __init__(self, name):
-        super().__init__(name)
-
-    def open(self, name):
-        return open(name, "w")
-
-    def lock(self, fd):
-        fcntl.flock(fd, fcntl.LOCK_EX)
+        for lock in reversed(self.locks):
+            lock.__exit__(exception_type, exception_value, traceback)
 
 
 class SubcommandBase(metaclass=abc.ABCMeta):
@@ -102,7 +93,10 @@ class SubcommandBaseWithWorkspace(SubcommandBase, metaclass=abc.ABCMeta):
     def main(self, args):
         root = find_root_directory(args.root)
         ensure_workspace(root)
-        self.run(args, Workspace.make(root))
+        self.run(args, self.make_workspace(args, root))
+
+    def make_workspace(self, args, root):
+        return Workspace.make(root, discovery=args.discovery)
 
     @abc.abstractmethod
     def run(self, args, workspace):
@@ -115,12 +109,12 @@ class SubcommandBaseWithWorkspaceLock(
     def make_workspace_lock(self, root):
         return self.make_lock(lock_node(root))
 
-    def make_multi_lock(self):
-        return self.make_lock(multi_lock_node())
+    def make_multi_lock(self, names):
+        return ShardedLock(self.make_lock, names)
 
     def run(self, args, workspace):
         with self.make_workspace_lock(workspace.root) as lock:
-            self.run_with_lock(args, workspace, lock)
+            return self.run_with_lock(args, workspace, lock)
 
     @abc.abstractmethod
     def make_lock(self, name):
@@ -143,3 +137,31 @@ class SubcommandBaseWithWorkspaceWriteLock(
 ):
     def make_lock(self, name):
         return WorkspaceWriteLock(name)
+
+
+class SubcommandBaseWithShimChanges(
+    SubcommandBaseWithWorkspaceWriteLock, metaclass=abc.ABCMeta
+):
+    def run(self, args, workspace):
+        changes = self.shim_changes(args, workspace)
+        request_id = enqueue_shim_changes(workspace.root, changes)
+        try:
+            super().run(args, workspace)
+        except BaseException:
+            discard_shim_changes(workspace.root, request_id)
+            raise
+        take_shim_changes_result(workspace.root, request_id)
+
+    def make_mount_lock(self, root):
+        # Shims only point into a mount, so its lock is shared.
+        ensure_lock_node(root)
+        return WorkspaceReadLock(lock_node(root))
+
+    def run_with_lock(self, args, workspace, lock):
+        commit_pending_shim_changes(
+            workspace.root, self.make_multi_lock, self.make_mount_lock
+        )
+
+    @abc.abstractmethod
+    def shim_changes(self, args, workspace):
+        pass
@@ -1,6 +1,13 @@
 import shlex
 
+from ._internal import (
+    add_bundle_argument,
+    add_references_arguments,
+    read_reference_arguments,
+)
 from .subcommand import SubcommandBaseWithWorkspaceReadLock, register_subcommand
+from ..actions.pipeline import PipelineAction
+from ..models.bundle import load_workspace_bundle
 from ..models.reference import Reference
 
 TARGET_TEMPLATE = """\
@@ -10,17 +17,35 @@ TARGET_TEMPLATE = """\
 """
 
 
-def _print_target(target):
-    arguments, variables = target.adapt(apply_substitutions=False)
-    environment_variables = [
+def _format_variables(variables):
+    return [
         "{key}={value}".format(key=key, value=value)
         for key, value in variables.items()
     ]
+
+
+def _format_command(arguments):
+    return " ".join([shlex.quote(arg) for arg in arguments])
+
+
+def _print_target(target):
+    arguments, variables = target.adapt(apply_substitutions=False)
+    command = _format_command(arguments)
+    for pipeline_action in target.find_actions(PipelineAction):
+        # Stage variables only apply to their own stage, so they are shown
+        # in front of its command.
+        command = " | ".join(
+            " ".join(
+                _format_variables(stage_variables)
+                + [_format_command(stage_arguments)]
+            ) for stage_arguments, stage_variables in
+            pipeline_action.adapt_stages(target, apply_substitutions=False)
+        )
     print(
         TARGET_TEMPLATE.format(
             reference=target.reference,
-            environment=" ".join(environment_variables),
-            command=" ".join([shlex.quote(arg) for arg in arguments]),
+            environment=" ".join(_format_variables(variables)),
+            command=command,
         )
     )
 
@@ -33,16 +58,25 @@ class TargetSubcommand(SubcommandBaseWithWorkspaceReadLock):
         return "Print the commands these targets map to in this repository.<Paste>"
 
     def configure_subparser(self, subparser):
-        subparser.add_argument(
-            "references",
-            nargs="+",
+        add_references_arguments(
+            subparser,
             help="References of the targets which map to commands."
         )
+        add_bundle_argument(subparser)
+
+    def make_workspace(self, args, root):
+        if args.bundle:
+            workspace = load_workspace_bundle(
+                root, args.bundle, discovery=args.discovery
+            )
+            if workspace:
+                return workspace
+        return super().make_workspace(args, root)
 
     def run_with_lock(self, args, workspace, lock):
         references = [
             Reference.make(reference, workspace.root)
-            for reference in args.references
+            for reference in read_reference_arguments(args)
         ]
         targets = []
         for reference in references:
@@ -1,26 +1,14 @@
 import logging
 
-from .subcommand import SubcommandBaseWithWorkspaceWriteLock, register_subcommand
+from ._internal import add_references_arguments, read_reference_arguments
+from .subcommand import SubcommandBaseWithShimChanges, register_subcommand
+from ..models.pending import ShimChanges
 from ..models.reference import Reference
-from ..models.shim import read_shims_node, write_shims_node, bind_shims
+from ..models.shim import find_installed_shims
+from ..models.workspace import Workspace
 
 
-def _uninstall_shim(target, shims):
-    name = target.reference.target_name
-    if name in shims:
-        logging.info(
-            "Uninstalling shim '%s' with target '%s'", name, target.reference
-        )
-        del shims[name]
-    else:
-        logging.debug(
-            "Skipping missing shim '%s' with target '%s'",
-            name,
-            target.reference,
-        )
-
-
-class UninstallSubcommand(SubcommandBaseWithWorkspaceWriteLock):
+class UninstallSubcommand(SubcommandBaseWithShimChanges):
     def name(self):
         return "uninstall"
 
@@ -28,9 +16,8 @@ class UninstallSubcommand(SubcommandBaseWithWorkspaceWriteLock):
         return "Uninstall shims for these targets."
 
     def configure_subparser(self, subparser):
-        subparser.add_argument(
-            "references",
-            nargs="+",
+        add_references_arguments(
+            subparser,
             help="References of the targets which map to commands."
         )
         subparser.add_argument(
@@ -40,22 +27,28 @@ class UninstallSubcommand(SubcommandBaseWithWorkspaceWriteLock):
             help="Bind shims in multi-namespace."
         )
 
-    def run_with_lock(self, args, workspace, lock):
+    def make_workspace(self, args, root):
+        # References are resolved against the installed shims, so no package
+        # node is loaded and shims of deleted packages can be uninstalled.
+        return Workspace(root, {}, discovery=args.discovery)
+
+    def shim_changes(self, args, workspace):
         references = [
             Reference.make(reference, workspace.root)
-            for reference in args.references
+            for reference in read_reference_arguments(args)
         ]
 
-        shims = read_shims_node(workspace.root)
-        for reference in references:
-            for target in workspace.find_targets(reference):
-                _uninstall_shim(target, shims)
-
-        write_shims_node(workspace.root, shims)
-        bind_shims(
-            workspace.root, shims,
-            self.make_multi_lock() if args.multi else None
-        )
+        uninstalls = []
+        for reference, shims in zip(
+            references, find_installed_shims(workspace.root, references)
+        ):
+            if not shims:
+                logging.warning(
+                    "No shims installed for reference %s", reference
+                )
+            uninstalls += sorted(shims.items())
+
+        return ShimChanges(uninstalls=uninstalls, multi=args.multi)
 
 
 register_subcommand(UninstallSubcommand())
@@ -0,0 +1,87 @@
+import logging
+import sys
+
+from ._internal import ensure_file, ensure_workspace, find_root_directory
+from .subcommand import (
+    ShardedLock,
+    SubcommandBase,
+    WorkspaceReadLock,
+    WorkspaceWriteLock,
+    register_subcommand,
+)
+from ..constants import lock_node
+from ..models.shim import read_shims_node, read_bind_mode
+from ..models.verify import (
+    find_bin_drift,
+    find_dangling_shims,
+    find_multi_drift,
+    multi_lock_names,
+)
+
+
+def _make_read_lock(name):
+    # Multi-namespace lock shards only exist once a bind has locked them.
+    ensure_file(name)
+    return WorkspaceReadLock(name)
+
+
+def _repair(drift):
+    remaining = []
+    for entry in drift:
+        if entry.repair is None:
+            remaining.append(entry)
+            continue
+        entry.repair()
+        logging.info("Repaired %s", entry)
+    return remaining
+
+
+class VerifySubcommand(SubcommandBase):
+    def name(self):
+        return "verify"
+
+    def help(self):
+        return "Report drift between installed shims and their bound files."
+
+    def configure_subparser(self, subparser):
+        subparser.add_argument(
+            "--multi",
+            action="store_true",
+            default=False,
+            help="Also verify shims bound in multi-namespace."
+        )
+        subparser.add_argument(
+            "--repair",
+            action="store_true",
+            default=False,
+            help=
+            "Rewrite drifted shim files and links instead of only reporting them. Shims of missing targets are still reported."
+        )
+
+    def main(self, args):
+        root = find_root_directory(args.root)
+        ensure_workspace(root)
+
+        make_lock = WorkspaceWriteLock if args.repair else _make_read_lock
+        with make_lock(lock_node(root)):
+            shims = read_shims_node(root)
+            drift = find_bin_drift(root, shims, read_bind_mode(root))
+            if args.multi:
+                with ShardedLock(make_lock, multi_lock_names(root, shims)):
+                    drift += find_multi_drift(root, shims)
+                    if args.repair:
+                        drift = _repair(drift)
+            elif args.repair:
+                drift = _repair(drift)
+            drift += find_dangling_shims(root, shims)
+
+        if not drift:
+            print("No drift between installed and bound shims")
+            return
+        print("Drift")
+        for entry in drift:
+            print("  {entry}".format(entry=entry))
+        sys.exit(1)
+
+
+register_subcommand(VerifySubcommand())
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+_PACKAGE_BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _PACKAGE_BASE)
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    # Shims call "sashimmi" through PATH, so put a wrapper for this tree
+    # there.
+    bin_directory = tmp_path / "path"
+    bin_directory.mkdir()
+    wrapper = bin_directory / "sashimmi"
+    wrapper.write_text(
+        "#!/bin/sh\nexec {python} -m sashimmi \"$@\"\n".format(
+            python=sys.executable
+        )
+    )
+    wrapper.chmod(0o755)
+    monkeypatch.setenv(
+        "PATH", "{path}{sep}{rest}".format(
+            path=bin_directory, sep=os.pathsep, rest=os.environ["PATH"]
+        )
+    )
+    monkeypatch.setenv("PYTHONPATH", _PACKAGE_BASE)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    (tmp_path / "data").mkdir()
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+
+    root = tmp_path / "workspace"
+    (root / ".sashimmi").mkdir(parents=True)
+    return root
+
+
+def write_package(root, path, content):
+    directory = root / path
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / ".sashimmi.yaml").write_text(content)
+
+
+def sashimmi(root, *arguments):
+    return subprocess.run(
+        ["sashimmi", "--root={root}".format(root=root)] + list(arguments),
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
@@ -0,0 +1,47 @@
+from sashimmi.models.discovery import DISCOVERY_WALK
+from sashimmi.models.reference import Reference
+from sashimmi.models.workspace import Workspace
+
+from conftest import write_package
+
+_PACKAGE = """\
+targets:
+  - name: direct
+    adapter: direct
+    actions:
+      - action: docker
+        image: alpine
+      - action: command
+        variables: {FOO: "%workspace 100%%"}
+        executable: env
+  - name: auto
+    actions:
+      - action: docker
+        image: alpine
+      - action: command
+        variables: {FOO: "x y"}
+        executable: sh
+        arguments: ["-c", "echo $FOO", "a b"]
+"""
+
+
+def _adapt(root, name):
+    workspace = Workspace.make(str(root), discovery=DISCOVERY_WALK)
+    target, = workspace.find_targets(
+        Reference.make("//pkg:" + name, str(root))
+    )
+    return target.adapt(apply_substitutions=True)
+
+
+def test_direct_container_variables_stay_out_of_the_host(workspace):
+    write_package(workspace, "pkg", _PACKAGE)
+    arguments, variables = _adapt(workspace, "direct")
+    assert variables == {}
+    assert "--env=FOO={root} 100%".format(root=workspace) in arguments
+
+
+def test_shell_fallback_quotes_plain_arguments(workspace):
+    write_package(workspace, "pkg", _PACKAGE)
+    arguments, variables = _adapt(workspace, "auto")
+    assert variables == {}
+    assert arguments[-3:] == ["sh", "-c", "FOO='x y' sh -c echo $FOO 'a b'"]
@@ -0,0 +1,38 @@
+from sashimmi.models.completion import load_completion_index
+from sashimmi.models.discovery import (
+    DISCOVERY_WALK,
+    discovery_inputs_are_current,
+    find_package_directories,
+)
+
+from conftest import write_package
+
+_PACKAGE = """\
+targets:
+  - name: hello
+    actions:
+      - action: command
+        executable: echo
+"""
+
+
+def test_walk_leaves_out_the_root_node(workspace):
+    write_package(workspace, "pkg", _PACKAGE)
+    inputs = {}
+    find_package_directories(
+        str(workspace), discovery=DISCOVERY_WALK, inputs=inputs
+    )
+    assert str(workspace / "pkg") in inputs
+    root_node = str(workspace / ".sashimmi")
+    assert not any(path.startswith(root_node) for path in inputs)
+
+
+def test_completion_index_stays_valid_after_cache_writes(workspace):
+    write_package(workspace, "pkg", _PACKAGE)
+    index = load_completion_index(str(workspace))
+    assert index["packages"]["pkg"]["targets"] == ["hello"]
+    (workspace / ".sashimmi" / "snapshots").mkdir(exist_ok=True)
+    assert discovery_inputs_are_current(index["discovery"])
+
+    write_package(workspace, "other", _PACKAGE)
+    assert not discovery_inputs_are_current(index["discovery"])
@@ -0,0 +1,64 @@
+import os
+import subprocess
+
+from conftest import sashimmi, write_package
+
+_PACKAGE = """\
+targets:
+  - name: tool
+    adapter: direct
+    actions:
+      - action: docker
+        image: example/tool:1
+      - action: command
+        executable: tool
+"""
+
+# Answers the docker commands prefetch and run use and logs every call.
+_STUB_DOCKER = """\
+#!/bin/sh
+echo "${{0##*/}} $*" >> {log}
+case "$1" in
+    image) echo '["example/tool@sha256:0123"]' ;;
+    run) echo "${{0##*/}} $*" ;;
+esac
+"""
+
+
+def _write_stub(path, log):
+    path.write_text(_STUB_DOCKER.format(log=log))
+    path.chmod(0o755)
+    return str(path)
+
+
+def _run(root, docker):
+    return subprocess.run(
+        ["sashimmi", "--root={root}".format(root=root), "run", "//pkg:tool"],
+        env=dict(os.environ, SASHIMMI_DOCKER=docker),
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+def test_prefetch_pins_digests_and_run_follows_sashimmi_docker(
+    workspace, tmp_path, monkeypatch
+):
+    write_package(workspace, "pkg", _PACKAGE)
+    log = tmp_path / "docker.log"
+    first = _write_stub(tmp_path / "first-docker", log)
+    second = _write_stub(tmp_path / "second-docker", log)
+
+    monkeypatch.setenv("SASHIMMI_DOCKER", first)
+    sashimmi(workspace, "prefetch", "--pin", "//pkg:tool")
+    assert log.read_text().splitlines() == [
+        "first-docker pull --quiet example/tool:1",
+        "first-docker image inspect --format {{json .RepoDigests}} "
+        "example/tool:1",
+    ]
+
+    # The second call launches from the reference table.
+    expected = "first-docker run example/tool@sha256:0123 tool\n"
+    assert _run(workspace, first) == expected
+    assert _run(workspace, first) == expected
+    assert _run(workspace, second) == expected.replace("first", "second")
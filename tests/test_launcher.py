@@ -0,0 +1,23 @@
+import json
+import zipfile
+
+from sashimmi.models.launcher import (
+    find_launcher_archive_drift,
+    write_launcher_archive,
+)
+
+
+def test_archive_from_other_sources_is_drift(workspace):
+    root = str(workspace)
+    assert find_launcher_archive_drift(root) == "missing"
+
+    path = write_launcher_archive(root)
+    assert find_launcher_archive_drift(root) is None
+
+    with zipfile.ZipFile(path, "a") as archive:
+        metadata = json.loads(archive.comment)
+        metadata["source_hash"] = "0" * 64
+        archive.comment = json.dumps(metadata).encode("utf-8")
+    assert find_launcher_archive_drift(root) == (
+        "built from other sashimmi sources"
+    )
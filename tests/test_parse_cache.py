@@ -0,0 +1,12 @@
+from sashimmi.models import sources
+from sashimmi.models.parse_cache import ParseCache
+from sashimmi.models.reference import Reference
+
+
+def test_key_covers_the_sashimmi_sources(workspace, monkeypatch):
+    cache = ParseCache(node=str(workspace / "parse-cache"))
+    package_reference = Reference.make("//pkg", str(workspace))
+    key = cache.key(package_reference, b"targets: []")
+
+    monkeypatch.setattr(sources, "_source_hash", "other")
+    assert cache.key(package_reference, b"targets: []") != key
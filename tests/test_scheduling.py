@@ -0,0 +1,13 @@
+import resource
+
+from sashimmi.models.scheduling import Scheduling
+
+
+def test_single_rlimit_value_keeps_the_hard_limit_in_docker():
+    hard = resource.getrlimit(resource.RLIMIT_NOFILE)[1]
+    expected_hard = -1 if hard == resource.RLIM_INFINITY else hard
+    scheduling = Scheduling(rlimits={"nofile": [64], "nproc": [10, 20]})
+    assert scheduling.docker_arguments() == [
+        "--ulimit=nofile=64:{hard}".format(hard=expected_hard),
+        "--ulimit=nproc=10:20",
+    ]
@@ -0,0 +1,61 @@
+import shlex
+import subprocess
+
+from conftest import sashimmi, write_package
+
+_PACKAGE = """\
+targets:
+  - name: show
+    actions:
+      - action: command
+        executable: printf
+        arguments: ["[%%s]"]
+"""
+
+_ARGUMENTS = ["a", "b c", "--flag", "%workspace"]
+
+
+def _call_script_shim(root):
+    return subprocess.run(
+        [str(root / ".sashimmi" / "bin" / "show")] + _ARGUMENTS,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+def _call_shell_function(root):
+    script = 'eval "$(sashimmi --root={root} shell-init)"; show {arguments}'
+    return subprocess.run(
+        [
+            "bash",
+            "-c",
+            script.format(
+                root=shlex.quote(str(root)),
+                arguments=" ".join(shlex.quote(a) for a in _ARGUMENTS),
+            ),
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+def test_script_shim_and_shell_function_pass_the_same_arguments(workspace):
+    write_package(workspace, "pkg", _PACKAGE)
+    sashimmi(workspace, "install", "//pkg:show")
+
+    expected = "[a][b c][--flag][{root}]".format(root=workspace)
+    # The first call builds the reference table, the second launches from it.
+    assert _call_script_shim(workspace) == expected
+    assert _call_script_shim(workspace) == expected
+    assert _call_shell_function(workspace) == expected
+
+
+def test_dispatcher_shim_passes_arguments(workspace):
+    write_package(workspace, "pkg", _PACKAGE)
+    sashimmi(workspace, "install", "//pkg:show")
+    sashimmi(workspace, "bind", "--mode=dispatcher")
+
+    expected = "[a][b c][--flag][{root}]".format(root=workspace)
+    assert _call_script_shim(workspace) == expected
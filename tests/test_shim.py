@@ -0,0 +1,45 @@
+import os
+
+from sashimmi.models import shim
+from sashimmi.models.reference import Reference
+
+from conftest import sashimmi, write_package
+
+_PACKAGE = """\
+targets:
+  - name: {name}-a
+    actions:
+      - action: command
+        executable: "true"
+  - name: {name}-b
+    actions:
+      - action: command
+        executable: "true"
+"""
+
+
+def test_stale_index_reads_shims_yaml_once(workspace, monkeypatch):
+    for name in ("one", "two"):
+        write_package(workspace, name, _PACKAGE.format(name=name))
+        sashimmi(workspace, "install", "//{name}:all".format(name=name))
+    # A hand edit leaves the reverse index behind shims.yaml.
+    shims_yaml = workspace / ".sashimmi" / "shims.yaml"
+    os.utime(shims_yaml, ns=(0, 0))
+
+    reads = []
+    read_shims_yaml = shim._read_shims_yaml
+    monkeypatch.setattr(
+        shim, "_read_shims_yaml",
+        lambda root: reads.append(root) or read_shims_yaml(root)
+    )
+    root = str(workspace)
+    references = [
+        Reference.make(reference, root)
+        for reference in ("//one:one-a", "//two:all", "//three:all")
+    ]
+    assert shim.find_installed_shims(root, references) == [
+        {"one-a": "//one:one-a"},
+        {"two-a": "//two:two-a", "two-b": "//two:two-b"},
+        {},
+    ]
+    assert reads == [root]
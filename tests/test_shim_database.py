@@ -0,0 +1,46 @@
+import sqlite3
+
+import pytest
+
+from sashimmi.models.shim_database import ShimDatabase
+
+
+def _indexes(path):
+    connection = sqlite3.connect(path)
+    try:
+        return sorted(
+            name for name, in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND name NOT LIKE 'sqlite_%'"
+            )
+        )
+    finally:
+        connection.close()
+
+
+def test_read_only_connection_upgrades_old_databases(tmp_path):
+    path = str(tmp_path / "shims.db")
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        """\
+CREATE TABLE shims (
+    name TEXT PRIMARY KEY NOT NULL,
+    reference TEXT NOT NULL,
+    package_path TEXT NOT NULL
+);
+CREATE INDEX shims_reference ON shims (reference);
+INSERT INTO shims VALUES ('tool', '//vendor//pkg:tool', 'pkg');
+"""
+    )
+    connection.close()
+
+    with ShimDatabase(path, read_only=True) as database:
+        assert database.find_by_package_prefix("vendor//pkg") == [
+            ("vendor//pkg", "tool", "//vendor//pkg:tool")
+        ]
+    assert _indexes(path) == ["shims_package_path"]
+
+    with ShimDatabase(path, read_only=True) as database:
+        assert database.read() == {"tool": "//vendor//pkg:tool"}
+        # Up-to-date databases are opened read-only.
+        with pytest.raises(sqlite3.OperationalError):
+            database.connection.execute("DELETE FROM shims")
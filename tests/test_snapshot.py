@@ -0,0 +1,49 @@
+import os
+import shutil
+
+from sashimmi.constants import SASHIMMI_SNAPSHOT_VARIABLE
+from sashimmi.models.discovery import DISCOVERY_WALK
+from sashimmi.models.snapshot import (
+    export_workspace_snapshot,
+    load_workspace_snapshot,
+)
+from sashimmi.models.workspace import Workspace
+
+from conftest import write_package
+
+_PACKAGE = """\
+targets:
+  - name: hello
+    actions:
+      - action: command
+        executable: echo
+"""
+
+
+def test_exported_snapshot_loads_back(workspace, monkeypatch):
+    monkeypatch.delenv(SASHIMMI_SNAPSHOT_VARIABLE, raising=False)
+    write_package(workspace, "pkg", _PACKAGE)
+    root = str(workspace)
+    export_workspace_snapshot(Workspace.make(root, discovery=DISCOVERY_WALK))
+
+    snapshot = load_workspace_snapshot(root)
+    assert snapshot is not None
+    assert len(snapshot.packages) == 1
+
+
+def test_snapshot_outside_the_snapshots_node_is_ignored(
+    workspace, monkeypatch
+):
+    write_package(workspace, "pkg", _PACKAGE)
+    root = str(workspace)
+    export_workspace_snapshot(Workspace.make(root, discovery=DISCOVERY_WALK))
+    outside = workspace.parent / "outside.pickle"
+    shutil.copy(os.environ[SASHIMMI_SNAPSHOT_VARIABLE], outside)
+
+    monkeypatch.setenv(
+        SASHIMMI_SNAPSHOT_VARIABLE,
+        os.path.join(
+            root, ".sashimmi", "snapshots", "..", "..", "..", outside.name
+        ),
+    )
+    assert load_workspace_snapshot(root) is None